@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# settings.py dobiera połączenia z bazą do serwera (bez trwałych połączeń pod ASGI)
+os.environ.setdefault('DJANGO_SERVER', 'asgi')
 
 application = get_asgi_application()
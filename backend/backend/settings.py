@@ -9,9 +9,12 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'sklep_gier',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -46,6 +50,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'sklep_gier.db_router.replica_routing_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,23 +88,122 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+def env_bool(name, default=False):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+# Ustawiane przez backend/asgi.py. Pod ASGI każde żądanie działa w innym wątku, więc trwałe
+# połączenia (CONN_MAX_AGE) nie są ponownie używane, tylko się mnożą – Django zaleca wtedy
+# CONN_MAX_AGE = 0 i pulę połączeń backendu. Pod WSGI (gunicorn) domyślne są trwałe połączenia.
+SERVING_ASGI = os.environ.get('DJANGO_SERVER') == 'asgi'
+
+
+def database_config(host):
+    """Połączenie z PostgreSQL z zmiennych środowiskowych DB_* (wspólne dla primary i replik)."""
+    config = {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'sklep_gier',
-        'USER': 'gameuser',
-        'PASSWORD': 'gamepass',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'NAME': os.environ.get('DB_NAME', 'sklep_gier'),
+        'USER': os.environ.get('DB_USER', 'gameuser'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'gamepass'),
+        'HOST': host,
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        # trwałe połączenia (tylko WSGI): jedno połączenie na wątek zamiast nowego przy każdym żądaniu
+        'CONN_MAX_AGE': 0 if SERVING_ASGI else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # sprawdzenie przed ponownym użyciem, czy połączenie nie zostało zerwane
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
     }
+    if env_bool('DB_POOL', default=SERVING_ASGI):
+        # pula psycopg 3 (Django 5.1+) zastępuje CONN_MAX_AGE, które musi wtedy wynosić 0;
+        # pod ASGI włączona domyślnie (DB_POOL=0 ją wyłącza)
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    return config
+
+
+DATABASES = {
+    'default': database_config(os.environ.get('DB_HOST', 'localhost')),
 }
 
+# Repliki tylko do odczytu (DB_REPLICA_HOSTS="replika1,replika2"), patrz sklep_gier.db_router
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = database_config(replica_host.strip())
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['sklep_gier.db_router.ReadReplicaRouter']
+# Żądania GET pod tymi ścieżkami czytają z replik; dane użytkownika (koszyk, biblioteka,
+# zamówienia) zostają na primary, żeby widział własne zapisy od razu
+DATABASE_REPLICA_PATHS = (
+    '/api/games/',
+    '/api/publishers/',
+    '/api/async/games/',
+    '/api/async/publishers/',
+)
+
 AUTH_USER_MODEL = 'sklep_gier.User'
 
 
+# Cache
+# Lokalnie (DEBUG) pamięć procesu; na produkcji CACHE_URL=redis://... (wymaga pakietu redis)
+# lub CACHE_URL=memcached://host:port (wymaga pakietu pymemcache).
+
+CACHE_URL = os.environ.get('CACHE_URL', '')
+
+if CACHE_URL.startswith('redis://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif CACHE_URL.startswith('memcached://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': CACHE_URL.removeprefix('memcached://'),
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    # generacja katalogu i wersje bibliotek (ETagi) muszą być wspólne dla wszystkich
+    # procesów – z LocMemCache każdy worker miałby własne i serwował nieaktualne odpowiedzi
+    raise ImproperlyConfigured("Ustaw CACHE_URL (redis:// lub memcached://) – wymagany przy DEBUG = False.")
+
+# Czas życia zbuforowanych odpowiedzi katalogu (sekundy); unieważnianie idzie sygnałami
+CATALOG_CACHE_TIMEOUT = int(os.environ.get('CATALOG_CACHE_TIMEOUT', 3600))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Pierwszy hasher jest docelowy; hasła zapisane starszymi (PBKDF2) są przeliczane
+# przy najbliższym poprawnym logowaniu (check_password)
+PASSWORD_HASHERS = [
+    'sklep_gier.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# Parametry Argon2id (32 MiB, 2 przebiegi, 1 wątek na weryfikację) – dostrajane przez bench_login
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 32768))
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 1))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -142,17 +246,42 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 #Media files
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "/media/"
+# Serwowanie mediów (sklep_gier.media): pliki z hashem w nazwie dostają Cache-Control immutable
+MEDIA_IMMUTABLE_PREFIXES = ("game_covers/variants/",)
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 3600))
+# Oddanie wysyłki plików serwerowi WWW: lokacja internal nginx (np. "/protected-media/")
+# albo nagłówek sendfile (np. "X-Sendfile"); puste – pliki wysyła Django
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+MEDIA_SENDFILE_HEADER = os.environ.get('MEDIA_SENDFILE_HEADER', '')
 
 #Django REST framework & JWT
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "sklep_gier.authentication.ClaimsJWTAuthentication",
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # liczba zaufanych proxy przed aplikacją – adres klienta do limitów (LoginThrottle) to
+    # NUM_PROXIES-ty wpis od końca X-Forwarded-For; przy 0 liczy się tylko REMOTE_ADDR,
+    # bo nagłówek bez proxy, które go nadpisuje, ustawia dowolnie sam klient
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Synchronizacja katalogu (/api/sync/catalog/): zakładka znacznika "since" na transakcje
+# zatwierdzone po odczycie oraz jak długo trzymamy ślady usuniętych obiektów
+SYNC_OVERLAP_SECONDS = 5
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Kubełki tokenów logowania (sklep_gier.throttling.LoginThrottle): (pojemność, tokenów na sekundę)
+LOGIN_THROTTLE_RATES = {
+    'ip': (30, 0.5),
+    'email': (5, 1 / 60),
 }
 
+# Jak długo (s) węzeł może używać zapamiętanego stanu użytkownika przy sprawdzaniu odwołania tokenu
+AUTH_STATE_CACHE_TIMEOUT = int(os.environ.get('AUTH_STATE_CACHE_TIMEOUT', 30))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -1,23 +1,33 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
 from django.conf import settings
-from django.conf.urls.static import static
 
 # Import widoków z aplikacji
 from sklep_gier.views import (
     GameViewSet,
     hello,
+    health,
     get_publishers,
     register,
     library,
+    recommendations,
+    sync_catalog,
     EmailTokenObtainPairView,
     cart_detail,
     cart_add_item,
     cart_update_item,
     cart_remove_item,
+    cart_batch,
+    checkout,
+    orders,
+    order_detail,
 )
 
+from sklep_gier import async_views
+from sklep_gier.export import catalog_export
+from sklep_gier.media import serve_media
+
 # Import widoków JWT
 from rest_framework_simplejwt.views import TokenRefreshView
 
@@ -34,15 +44,35 @@ urlpatterns = [
 
     # Proste endpointy funkcjonalne
     path('api/hello/', hello),
+    path('api/health/', health, name='health'),
     path('api/publishers/', get_publishers),
     path('api/library/', library, name='library'),
+    path('api/recommendations/', recommendations, name='recommendations'),
+
+    # Strumieniowy eksport katalogu (NDJSON/CSV, pełny lub przyrostowy)
+    path('api/catalog/export/', catalog_export, name='catalog_export'),
+    path('api/sync/catalog/', sync_catalog, name='sync_catalog'),
+
+    # Wersje async (ASGI) endpointów do odczytu katalogu i biblioteki
+    path('api/async/publishers/', async_views.publishers, name='async_publishers'),
+    path('api/async/games/', async_views.game_list, name='async_game_list'),
+    path('api/async/games/<int:pk>/', async_views.game_detail, name='async_game_detail'),
+    path('api/async/library/', async_views.library, name='async_library'),
 
     # Endpointy koszyka
     path('api/cart/', cart_detail, name='cart_detail'),
     path('api/cart/add/', cart_add_item, name='cart_add_item'),
+    path('api/cart/batch/', cart_batch, name='cart_batch'),
     path('api/cart/update/<int:item_id>/', cart_update_item, name='cart_update_item'),
     path('api/cart/remove/<int:item_id>/', cart_remove_item, name='cart_remove_item'),
 
+    # Składanie zamówienia z koszyka
+    path('api/checkout/', checkout, name='checkout'),
+
+    # Historia zamówień
+    path('api/orders/', orders, name='orders'),
+    path('api/orders/<int:order_id>/', order_detail, name='order_detail'),
+
     # Rejestracja użytkownika (dostępna bez autoryzacji)
     path("api/register/", register, name="register"),
 
@@ -51,9 +81,8 @@ urlpatterns = [
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 ]
 
-# Obsługa plików medialnych w trybie deweloperskim
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT
-    )
+# Obsługa plików medialnych (także produkcyjnie – nagłówki cache, Range, X-Accel-Redirect)
+if settings.MEDIA_URL.startswith("/"):
+    urlpatterns += [
+        re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", serve_media, name="media"),
+    ]
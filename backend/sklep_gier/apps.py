@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SklepGierConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sklep_gier'
+
+    def ready(self):
+        from . import signals  # noqa: F401
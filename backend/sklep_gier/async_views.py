@@ -0,0 +1,84 @@
+"""
+Asynchroniczne (ASGI) wersje najczęściej czytanych endpointów.
+
+Zwracają to samo co widoki DRF z views.py, ale czekają na bazę przez async ORM
+(``aiterator``, ``aget``) zamiast blokować wątek roboczy. DRF nie obsługuje widoków
+async, więc są to zwykłe widoki Django z JsonResponse; uwierzytelnianie JWT i
+walidacja filtrów korzystają z tych samych klas co wersje synchroniczne.
+Stronicowanie kluczowe i fasety zostają w widokach synchronicznych.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .authentication import ClaimsJWTAuthentication
+from .cache import acache_catalog_response, check_etag_preconditions, user_etag
+from .filters import GameFilterSerializer, filter_games
+from .models import Game, Publisher
+from .serializers import GameSerializer
+
+CHUNK_SIZE = 500
+
+
+async def _serialize_games(request, queryset):
+    # prefetch_related działa z aiterator() przy podanym chunk_size (Django 5.0+)
+    games = [game async for game in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+    return GameSerializer(games, many=True, context={"request": request}).data
+
+
+async def _authenticate(request):
+    """Użytkownik z nagłówka ``Authorization: Bearer <jwt>`` albo None."""
+    authentication = ClaimsJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    token = authentication.get_validated_token(raw_token)
+    return await sync_to_async(authentication.get_user)(token)
+
+
+@acache_catalog_response
+@require_GET
+async def publishers(request):
+    rows = Publisher.objects.values("id", "name", "website")
+    return JsonResponse([row async for row in rows.aiterator()], safe=False)
+
+
+@acache_catalog_response
+@require_GET
+async def game_list(request):
+    params = GameFilterSerializer(data=request.GET)
+    if not params.is_valid():
+        return JsonResponse(params.errors, status=400)
+    queryset = filter_games(Game.objects.with_related(), params.validated_data)
+    return JsonResponse(await _serialize_games(request, queryset), safe=False)
+
+
+@acache_catalog_response
+@require_GET
+async def game_detail(request, pk):
+    try:
+        game = await Game.objects.with_related().aget(pk=pk)
+    except Game.DoesNotExist:
+        raise Http404
+    return JsonResponse(GameSerializer(game, context={"request": request}).data)
+
+
+@require_GET
+async def library(request):
+    try:
+        user = await _authenticate(request)
+    except (InvalidToken, AuthenticationFailed) as exc:
+        return JsonResponse({"detail": str(exc.detail)}, status=401)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    etag = await sync_to_async(user_etag)("library", user.pk)
+    not_modified = check_etag_preconditions(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    data = await _serialize_games(request, user.library.with_related())
+    return JsonResponse(data, safe=False, headers={"ETag": etag})
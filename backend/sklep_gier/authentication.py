@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import auth_state_key
+from .models import User
+
+# Claimy dodawane przez EmailTokenObtainPairSerializer.get_token
+ACTIVE_CLAIM = "active"
+VERSION_CLAIM = "ver"
+
+
+def auth_state(user_id):
+    """(token_version, is_active) użytkownika – z cache (AUTH_STATE_CACHE_TIMEOUT) albo z bazy."""
+    key = auth_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values_list("token_version", "is_active").first()
+        # brak użytkownika też zapamiętujemy, żeby usunięte konto nie odpytywało bazy za każdym razem
+        cache.set(key, state or (None, False), timeout=settings.AUTH_STATE_CACHE_TIMEOUT)
+    return tuple(state) if state else (None, False)
+
+
+def user_from_claims(user_id, token_version):
+    """
+    Obiekt User z samym id, is_active i token_version; pozostałe pola są odroczone
+    (deferred) i doczytywane z bazy dopiero przy pierwszym użyciu. Filtry typu
+    ``Cart.objects.filter(user=user)`` potrzebują tylko klucza, więc nie pytają o wiersz.
+    """
+    known = {"id": user_id, "is_active": True, "token_version": token_version}
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in known]
+    return User.from_db(None, fields, [known[name] for name in fields])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication bez pobierania wiersza User przy każdym żądaniu: ufa podpisanym
+    claimom (id, active, ver), a odwołanie sprawdza w krótko żyjącym cache stanu.
+    Tokeny bez tych claimów (wydane przed zmianą) idą dotychczasową ścieżką.
+    """
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed("Token contained no recognizable user identification")
+        if not validated_token.get(ACTIVE_CLAIM, False):
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        version, is_active = auth_state(user_id)
+        if version is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if version != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        return user_from_claims(user_id, version)
@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+# Licznik generacji katalogu – każda zmiana gier, wydawców lub gatunków go podbija,
+# przez co wszystkie wcześniejsze wpisy przestają być adresowane (bez kasowania kluczy).
+GENERATION_KEY = "catalog:generation"
+MODIFIED_KEY = "catalog:modified"
+# Jak długo czekający na wpis proces odpytuje cache, zanim sam wyrenderuje odpowiedź
+LOCK_TIMEOUT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+
+def catalog_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        cache.add(MODIFIED_KEY, int(time.time()), timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_catalog_generation():
+    """Unieważnia wszystkie zbuforowane odpowiedzi katalogu."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # klucz wygasł lub backend go wyrzucił – zaczynamy od nowa
+        cache.add(GENERATION_KEY, 1, timeout=None)
+    cache.set(MODIFIED_KEY, int(time.time()), timeout=None)
+
+
+def catalog_last_modified():
+    return cache.get(MODIFIED_KEY) or int(time.time())
+
+
+def _response_key(request, generation):
+    raw = "|".join((request.get_full_path(), request.META.get("HTTP_ACCEPT", "")))
+    return f"catalog:{generation}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def _build_entry(response, last_modified):
+    if hasattr(response, "render"):
+        response.render()
+    if response.status_code != 200:
+        return response, None
+    entry = {
+        "content": response.content,
+        "content_type": response["Content-Type"],
+        "etag": quote_etag(hashlib.md5(response.content).hexdigest()),
+        "last_modified": last_modified,
+    }
+    return response, entry
+
+
+def _render_entry(view, request, args, kwargs):
+    return _build_entry(view(request, *args, **kwargs), catalog_last_modified())
+
+
+async def _arender_entry(view, request, args, kwargs):
+    response = await view(request, *args, **kwargs)
+    return _build_entry(response, await sync_to_async(catalog_last_modified)())
+
+
+def _wait_for_entry(key):
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+async def _await_entry(key):
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _entry_response(request, entry):
+    response = HttpResponse(entry["content"], content_type=entry["content_type"])
+    response["ETag"] = entry["etag"]
+    response["Last-Modified"] = http_date(entry["last_modified"])
+    patch_cache_control(response, public=True, no_cache=True)
+    patch_vary_headers(response, ("Accept", "Authorization"))
+    return get_conditional_response(
+        request,
+        etag=entry["etag"],
+        last_modified=entry["last_modified"],
+        response=response,
+    )
+
+
+def cache_catalog_response(view):
+    """
+    Read-through cache gotowych (wyrenderowanych) odpowiedzi katalogu dla
+    anonimowych żądań GET, kluczowany ścieżką z parametrami i generacją katalogu.
+
+    Po unieważnieniu tylko jeden proces renderuje dany wpis (blokada ``cache.add``),
+    pozostali czekają na jego wynik. Odpowiedzi niosą ETag i Last-Modified,
+    więc przeglądarka dostaje 304 przy niezmienionym katalogu.
+    """
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if request.method != "GET" or "HTTP_AUTHORIZATION" in request.META:
+            return view(request, *args, **kwargs)
+
+        key = _response_key(request, catalog_generation())
+        entry = cache.get(key)
+        if entry is None:
+            lock_key = f"{key}:lock"
+            if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+                try:
+                    response, entry = _render_entry(view, request, args, kwargs)
+                    if entry is None:
+                        return response
+                    cache.set(key, entry, timeout=settings.CATALOG_CACHE_TIMEOUT)
+                finally:
+                    cache.delete(lock_key)
+            else:
+                entry = _wait_for_entry(key)
+                if entry is None:
+                    response, entry = _render_entry(view, request, args, kwargs)
+                    if entry is None:
+                        return response
+        return _entry_response(request, entry)
+
+    return wrapped
+
+
+def acache_catalog_response(view):
+    """Wariant ``cache_catalog_response`` dla widoków async – czekanie na wpis nie blokuje pętli zdarzeń."""
+
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        if request.method != "GET" or "HTTP_AUTHORIZATION" in request.META:
+            return await view(request, *args, **kwargs)
+
+        key = _response_key(request, await sync_to_async(catalog_generation)())
+        entry = await cache.aget(key)
+        if entry is None:
+            lock_key = f"{key}:lock"
+            if await cache.aadd(lock_key, 1, timeout=LOCK_TIMEOUT):
+                try:
+                    response, entry = await _arender_entry(view, request, args, kwargs)
+                    if entry is None:
+                        return response
+                    await cache.aset(key, entry, timeout=settings.CATALOG_CACHE_TIMEOUT)
+                finally:
+                    await cache.adelete(lock_key)
+            else:
+                entry = await _await_entry(key)
+                if entry is None:
+                    response, entry = await _arender_entry(view, request, args, kwargs)
+                    if entry is None:
+                        return response
+        return _entry_response(request, entry)
+
+    return wrapped
+
+
+# Wersje danych użytkownika (biblioteka) – losowy znacznik podmieniany przy każdej
+# zmianie. Po wyrzuceniu klucza z cache powstaje nowy znacznik, więc stary ETag nigdy nie pasuje.
+def user_version(kind, user_id):
+    key = f"{kind}:version:{user_id}"
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_user_version(kind, user_id):
+    cache.set(f"{kind}:version:{user_id}", uuid.uuid4().hex, timeout=None)
+
+
+def bump_user_version_on_commit(kind, user_id):
+    transaction.on_commit(partial(bump_user_version, kind, user_id))
+
+
+def user_etag(kind, user_id):
+    # dane użytkownika podawane razem z danymi gier (biblioteka) – zmiana katalogu też zmienia ETag
+    return quote_etag(f"{kind}-{user_version(kind, user_id)}-{catalog_generation()}")
+
+
+def check_etag_preconditions(request, etag):
+    """
+    Obsługa If-None-Match (GET -> 304) i If-Match (zmiany -> 412) dla podanego ETagu.
+    Zwraca gotową odpowiedź albo None, gdy widok ma działać dalej.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+    return response
+
+
+# Stan uwierzytelnienia użytkownika (wersja tokenów, is_active) dla ClaimsJWTAuthentication –
+# krótki TTL ogranicza, jak długo odwołany token może jeszcze działać na innych węzłach
+def auth_state_key(user_id):
+    return f"auth:state:{user_id}"
+
+
+def invalidate_auth_state(user_id):
+    cache.delete(auth_state_key(user_id))
+
+
+def invalidate_auth_state_on_commit(user_id):
+    transaction.on_commit(partial(invalidate_auth_state, user_id))
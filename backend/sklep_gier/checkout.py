@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+
+from .cache import bump_user_version_on_commit
+from .models import Cart, CartItem, Order, OrderItem, User
+from .recommendations import record_library_changes
+
+
+class EmptyCartError(Exception):
+    pass
+
+
+class OrderLimitError(Exception):
+    """Koszyk, którego nie da się zapisać jako zamówienie (ilość lub suma poza zakresem)."""
+
+
+def _max_order_total():
+    field = Order._meta.get_field("total_price")
+    return Decimal(10) ** (field.max_digits - field.decimal_places) - Decimal(10) ** -field.decimal_places
+
+
+MAX_ORDER_TOTAL = _max_order_total()
+
+
+def checkout_cart(user, idempotency_key=None):
+    """
+    Zamienia koszyk użytkownika w zamówienie w jednej transakcji:
+    blokada koszyka, snapshot cen, Order + OrderItem (jeden bulk_create),
+    gry do biblioteki (bulk_create na tabeli pośredniej) i wyczyszczenie koszyka.
+
+    Zwraca (order, created). Ponowienie z tym samym ``idempotency_key`` zwraca
+    istniejące zamówienie zamiast tworzyć drugie.
+    """
+    try:
+        with transaction.atomic():
+            return _checkout_cart(user, idempotency_key)
+    except IntegrityError:
+        # równoległe żądanie z tym samym kluczem zdążyło zapisać zamówienie; każde inne
+        # naruszenie (albo brak takiego zamówienia) to prawdziwy błąd, nie powtórzenie
+        if idempotency_key is None:
+            raise
+        existing = Order.objects.filter(user=user, idempotency_key=idempotency_key).first()
+        if existing is None:
+            raise
+        return existing, False
+
+
+def _checkout_cart(user, idempotency_key):
+    # blokada wiersza koszyka szereguje równoległe checkouty tego samego użytkownika
+    cart = Cart.objects.select_for_update().filter(user=user).first()
+
+    if idempotency_key is not None:
+        existing = Order.objects.filter(user=user, idempotency_key=idempotency_key).first()
+        if existing is not None:
+            return existing, False
+
+    if cart is None:
+        raise EmptyCartError
+    items = list(CartItem.objects.filter(cart=cart).select_related("game"))
+    if not items:
+        raise EmptyCartError
+
+    # pozycje sprzed wprowadzenia limitu mogą mieć dowolną ilość – sprawdzamy przed rozpisaniem
+    # na sztuki, a sumę przed zapisem do kolumny o ograniczonej precyzji
+    if any(item.quantity > CartItem.MAX_QUANTITY for item in items):
+        raise OrderLimitError(f"quantity must not exceed {CartItem.MAX_QUANTITY}")
+    total = sum(item.quantity * item.game.price for item in items)
+    if total > MAX_ORDER_TOTAL:
+        raise OrderLimitError(f"order total must not exceed {MAX_ORDER_TOTAL}")
+    order = Order.objects.create(
+        user=user,
+        total_price=total,
+        status="completed",
+        idempotency_key=idempotency_key,
+    )
+    # jedna pozycja zamówienia na sztukę, z ceną z chwili zakupu
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, game_id=item.game_id, price_snapshot=item.game.price)
+        for item in items
+        for _ in range(item.quantity)
+    )
+
+    Library = User.library.through
+    game_ids = {item.game_id for item in items}
+    owned = set(Library.objects.filter(user=user, game_id__in=game_ids).values_list("game_id", flat=True))
+    Library.objects.bulk_create(
+        [Library(user_id=user.pk, game_id=game_id) for game_id in game_ids - owned],
+        ignore_conflicts=True,
+    )
+    CartItem.objects.filter(cart=cart).delete()
+    cart.bump_version()
+
+    # bulk_create omija m2m_changed, więc wersję biblioteki i dziennik rekomendacji obsługujemy sami
+    bump_user_version_on_commit("library", user.pk)
+    record_library_changes([(user.pk, game_id) for game_id in game_ids - owned], 1)
+    return order, True
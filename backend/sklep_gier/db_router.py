@@ -0,0 +1,60 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+# Ustawiane przez middleware na czas żądania, które może czytać z repliki
+use_replica = ContextVar("use_replica", default=False)
+
+
+def _replica_allowed(request):
+    return request.method in ("GET", "HEAD") and request.path.startswith(settings.DATABASE_REPLICA_PATHS)
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """Oznacza żądania GET/HEAD pod DATABASE_REPLICA_PATHS jako obsługiwane z repliki."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = use_replica.set(_replica_allowed(request))
+            try:
+                return await get_response(request)
+            finally:
+                use_replica.reset(token)
+    else:
+        def middleware(request):
+            token = use_replica.set(_replica_allowed(request))
+            try:
+                return get_response(request)
+            finally:
+                use_replica.reset(token)
+    return middleware
+
+
+class ReadReplicaRouter:
+    """
+    Odczyty z oznaczonych żądań trafiają do losowej repliki (settings.DATABASE_REPLICAS),
+    wszystko inne – zapisy, transakcje i pozostałe żądania – do bazy głównej.
+    Bez skonfigurowanych replik router nic nie zmienia.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or not use_replica.get():
+            return None
+        # wewnątrz transakcji czytamy z tej samej bazy, do której piszemy
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # repliki zawierają te same dane co baza główna
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,152 @@
+"""
+Strumieniowy eksport katalogu (NDJSON / CSV) dla partnerów i indeksera wyszukiwarki.
+
+Wiersze są czytane przez ``.values().iterator(chunk_size=...)`` (na PostgreSQL kursor
+po stronie serwera) i od razu wysyłane w StreamingHttpResponse, więc pamięć nie
+zależy od rozmiaru katalogu. Format kolumn jest zgodny z feedem ``import_catalog``.
+"""
+import csv
+import json
+import zlib
+from itertools import islice
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import CharField, OuterRef, Subquery
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_GET
+
+from .feeds import GENRE_SEPARATOR
+from .models import Game
+from .search import is_postgres
+from .sync import parse_timestamp, sync_cursor
+
+GameGenre = Game.genres.through
+EXPORT_FIELDS = (
+    "id", "external_id", "title", "description", "price",
+    "release_date", "publisher", "genres", "updated_at",
+)
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+CHUNK_SIZE = 2_000
+
+
+def _genre_names_subquery():
+    # jedna tablica nazw na grę – bez JOIN-a z GROUP BY po całym katalogu
+    return Subquery(
+        GameGenre.objects.filter(game_id=OuterRef("pk"))
+        .values("game_id")
+        .annotate(names=ArrayAgg("genre__name", ordering="genre__name"))
+        .values("names"),
+        output_field=ArrayField(CharField()),
+    )
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Słowniki z polami EXPORT_FIELDS w kolejności id. Na PostgreSQL gatunki przychodzą
+    z tego samego zapytania (ArrayAgg), gdzie indziej – jednym zapytaniem na porcję.
+    """
+    rows = queryset.order_by("id").values(
+        "id", "external_id", "title", "description", "price", "release_date", "updated_at", "publisher__name",
+    )
+    if is_postgres():
+        for row in rows.annotate(genres=_genre_names_subquery()).iterator(chunk_size=chunk_size):
+            row["publisher"] = row.pop("publisher__name")
+            row["genres"] = row["genres"] or []
+            yield row
+        return
+
+    rows = rows.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        genres = {row["id"]: [] for row in chunk}
+        links = (
+            GameGenre.objects.filter(game_id__in=genres)
+            .order_by("genre__name")
+            .values_list("game_id", "genre__name")
+        )
+        for game_id, name in links:
+            genres[game_id].append(name)
+        for row in chunk:
+            row["publisher"] = row.pop("publisher__name")
+            row["genres"] = genres[row["id"]]
+            yield row
+
+
+class _Echo:
+    """Bufor dla csv.writer – ``write`` zwraca linię zamiast ją zapisywać."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row["genres"] = GENRE_SEPARATOR.join(row["genres"])
+        row["updated_at"] = row["updated_at"].isoformat()
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def encode_chunks(lines, compress=False, lines_per_chunk=500):
+    """
+    Skleja linie w większe kawałki (mniej wywołań write() po stronie serwera)
+    i opcjonalnie kompresuje je gzipem w locie.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    while batch := list(islice(lines, lines_per_chunk)):
+        data = "".join(batch).encode()
+        if compressor is None:
+            yield data
+        elif compressed := compressor.compress(data):
+            yield compressed
+    if compressor is not None:
+        yield compressor.flush()
+
+
+@require_GET
+def catalog_export(request):
+    """
+    ``GET /api/catalog/export/?format=ndjson|csv&updated_since=<ISO 8601>``
+
+    Pełny zrzut katalogu albo – z ``updated_since`` – tylko gry zmienione od podanej
+    chwili. Wartość nagłówka ``X-Export-Timestamp`` klient przekazuje jako ``updated_since``
+    przy następnym pobraniu; usunięte gry podaje /api/sync/catalog/. Z ``Accept-Encoding:
+    gzip`` odpowiedź jest kompresowana w locie.
+    """
+    export_format = request.GET.get("format", "ndjson")
+    if export_format not in CONTENT_TYPES:
+        return JsonResponse({"detail": f"unsupported format: {export_format}"}, status=400)
+
+    cursor = sync_cursor()
+    queryset = Game.objects.all()
+    if "updated_since" in request.GET:
+        updated_since = parse_timestamp(request.GET["updated_since"])
+        if updated_since is None:
+            return JsonResponse({"detail": "updated_since must be an ISO 8601 timestamp"}, status=400)
+        queryset = queryset.filter(updated_at__gt=updated_since)
+
+    lines = (ndjson_lines if export_format == "ndjson" else csv_lines)(export_rows(queryset))
+    compress = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+    response = StreamingHttpResponse(
+        encode_chunks(lines, compress=compress),
+        content_type=CONTENT_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="catalog.{export_format}"',
+            "X-Export-Timestamp": cursor.isoformat(),
+        },
+    )
+    if compress:
+        response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
@@ -0,0 +1,32 @@
+import csv
+import gzip
+import json
+import os
+
+FORMATS = ("csv", "jsonl")
+# gatunki w CSV: "RPG|Akcja"; w JSONL lista albo ten sam format
+GENRE_SEPARATOR = "|"
+
+
+def detect_format(path):
+    """Format pliku z rozszerzenia (``.csv``, ``.csv.gz``; wszystko inne to JSONL)."""
+    name = os.path.basename(path)
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return "csv" if name.endswith(".csv") else "jsonl"
+
+
+def read_rows(path, file_format=None):
+    """
+    Strumień słowników z pliku CSV (nagłówek) lub JSONL, także skompresowanego gzipem.
+    Plik jest czytany wiersz po wierszu, więc pamięć nie zależy od jego rozmiaru.
+    """
+    file_format = file_format or detect_format(path)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as file:
+        if file_format == "csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
@@ -0,0 +1,98 @@
+from django.db.models import Count
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Game
+
+GameGenre = Game.genres.through
+
+
+class GameFilterSerializer(serializers.Serializer):
+    """Walidacja parametrów filtrowania katalogu (query string)."""
+
+    genre = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    genre_mode = serializers.ChoiceField(choices=("any", "all"), default="any")
+    publisher = serializers.IntegerField(min_value=1, required=False)
+    price_min = serializers.DecimalField(max_digits=6, decimal_places=2, required=False)
+    price_max = serializers.DecimalField(max_digits=6, decimal_places=2, required=False)
+    released_after = serializers.DateField(required=False)
+    released_before = serializers.DateField(required=False)
+    rating_min = serializers.DecimalField(max_digits=3, decimal_places=2, min_value=0, max_value=5, required=False)
+
+    def to_internal_value(self, data):
+        data = data.copy()
+        # ?genre=1,2 oraz ?genre=1&genre=2
+        genres = [g for value in data.getlist("genre") for g in value.split(",") if g]
+        data.setlist("genre", genres)
+        return super().to_internal_value(data)
+
+
+class GameFacetFilter(BaseFilterBackend):
+    """
+    Filtrowanie katalogu po gatunkach (dowolny/wszystkie), wydawcy,
+    przedziale cen, dacie wydania i minimalnej ocenie.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = GameFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return filter_games(queryset, params.validated_data)
+
+
+def filter_games(queryset, filters):
+    """Nakłada zwalidowane (GameFilterSerializer) filtry katalogu na queryset gier."""
+    genres = set(filters.get("genre", ()))
+    if genres:
+        # podzapytanie po tabeli pośredniej zamiast JOIN – bez duplikatów i DISTINCT
+        matching = GameGenre.objects.filter(genre_id__in=genres)
+        if filters["genre_mode"] == "all":
+            matching = (
+                matching.values("game_id")
+                .annotate(matched=Count("genre_id"))
+                .filter(matched=len(genres))
+            )
+        queryset = queryset.filter(id__in=matching.values("game_id"))
+
+    if "publisher" in filters:
+        queryset = queryset.filter(publisher_id=filters["publisher"])
+    if "price_min" in filters:
+        queryset = queryset.filter(price__gte=filters["price_min"])
+    if "price_max" in filters:
+        queryset = queryset.filter(price__lte=filters["price_max"])
+    if "released_after" in filters:
+        queryset = queryset.filter(release_date__gte=filters["released_after"])
+    if "released_before" in filters:
+        queryset = queryset.filter(release_date__lte=filters["released_before"])
+    if "rating_min" in filters:
+        queryset = queryset.filter(rating_avg__gte=filters["rating_min"])
+    return queryset
+
+
+def game_facets(queryset):
+    """
+    Liczba gier per gatunek i per wydawca dla przefiltrowanego katalogu –
+    dwa zapytania GROUP BY niezależnie od liczby gier.
+    """
+    queryset = queryset.order_by().prefetch_related(None)
+    game_ids = queryset.values("id")
+    genres = (
+        GameGenre.objects.filter(game_id__in=game_ids)
+        .values("genre_id", "genre__name")
+        .annotate(count=Count("game_id"))
+        .order_by("genre__name")
+    )
+    publishers = (
+        queryset.values("publisher_id", "publisher__name")
+        .annotate(count=Count("id"))
+        .order_by("publisher__name")
+    )
+    return {
+        "genres": [
+            {"id": row["genre_id"], "name": row["genre__name"], "count": row["count"]}
+            for row in genres
+        ],
+        "publishers": [
+            {"id": row["publisher_id"], "name": row["publisher__name"], "count": row["count"]}
+            for row in publishers
+        ],
+    }
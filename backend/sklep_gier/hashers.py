@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id z parametrami z ustawień (ARGON2_*), dobranymi pod czas logowania na rdzeń
+    (``manage.py bench_login``). Zmiana parametrów powoduje przeliczenie skrótu przy
+    najbliższym poprawnym logowaniu – tak samo jak migracja z PBKDF2.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
@@ -0,0 +1,85 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import Game
+
+# Szerokości wariantów okładki (px) – siatka katalogu, karta gry, strona szczegółów
+COVER_WIDTHS = (160, 320, 640, 960)
+# format w srcset -> (format Pillow, rozszerzenie, opcje zapisu)
+COVER_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 6}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+VARIANTS_DIR = "game_covers/variants"
+
+
+def _encode(image, image_format, options):
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _without_opaque_alpha(image):
+    """RGBA tylko dla okładek z faktyczną przezroczystością – reszta jako RGB."""
+    if "A" not in image.getbands() and "transparency" not in image.info:
+        return image.convert("RGB")
+    image = image.convert("RGBA")
+    if image.getchannel("A").getextrema()[0] == 255:
+        return image.convert("RGB")
+    return image
+
+
+def _flatten(image):
+    """JPEG nie ma kanału alfa – przezroczyste tło zamieniamy na białe (convert dałby czarne)."""
+    if image.mode != "RGBA":
+        return image
+    background = Image.new("RGB", image.size, "white")
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def build_cover_variants(name, storage=default_storage):
+    """
+    Generuje przeskalowane warianty WebP/JPEG okładki zapisanej pod ``name``.
+
+    Nazwy plików zawierają skrót treści oryginału, więc zmiana okładki daje nowe
+    adresy, a istniejące pliki można cache'ować bez końca. Zwraca słownik do zapisania
+    w ``Game.cover_variants``: adres oryginału i listy [szerokość, adres] per format.
+    """
+    with storage.open(name, "rb") as file:
+        data = file.read()
+    digest = hashlib.sha256(data).hexdigest()[:16]
+
+    with Image.open(BytesIO(data)) as original:
+        image = _without_opaque_alpha(ImageOps.exif_transpose(original))
+
+    variants = {"source": name, "original": storage.url(name)}
+    for key in COVER_FORMATS:
+        variants[key] = []
+    # bez powiększania – mniejsze oryginały dostają wariant w swojej szerokości
+    for width in sorted({min(width, image.width) for width in COVER_WIDTHS}):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for key, (image_format, extension, options) in COVER_FORMATS.items():
+            path = f"{VARIANTS_DIR}/{digest}-{width}.{extension}"
+            if not storage.exists(path):
+                frame = _flatten(resized) if image_format == "JPEG" else resized
+                path = storage.save(path, _encode(frame, image_format, options))
+            variants[key].append([width, storage.url(path)])
+    return variants
+
+
+def cover_variants_stale(game):
+    """Czy zapisane warianty nie odpowiadają bieżącemu plikowi okładki."""
+    return (game.cover_image.name or None) != game.cover_variants.get("source")
+
+
+def update_cover_variants(game):
+    """Przelicza warianty okładki jednej gry i zapisuje je UPDATE-em (bez ponownego post_save)."""
+    variants = build_cover_variants(game.cover_image.name) if game.cover_image else {}
+    Game.objects.filter(pk=game.pk).update(cover_variants=variants)
+    game.cover_variants = variants
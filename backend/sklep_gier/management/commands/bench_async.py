@@ -0,0 +1,134 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class HttpConnection:
+    """Minimalny klient HTTP/1.1 keep-alive na asyncio – bez zależności poza biblioteką standardową."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def get(self, path, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}", *headers, "", ""]
+        self.writer.write("\r\n".join(lines).encode())
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length, chunked, close = None, False, False
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding":
+                chunked = "chunked" in value
+            elif name == "connection":
+                close = value == "close"
+
+        if chunked:
+            while size := int((await self.reader.readline()).strip(), 16):
+                await self.reader.readexactly(size + 2)
+            await self.reader.readline()
+        elif length is not None:
+            await self.reader.readexactly(length)
+        else:
+            await self.reader.read()
+            close = True
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def run_load(url, headers, total, concurrency):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    remaining = iter(range(total))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        connection = HttpConnection(parts.hostname, parts.port or 80)
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                status = await connection.get(path, headers)
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+                connection.close()
+                errors += 1
+                continue
+            if status >= 400:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+        connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        "Porównuje przepustowość i opóźnienie p50/p99 endpointów synchronicznych (WSGI) "
+        "i async (ASGI) przy wysokiej współbieżności. Serwery trzeba uruchomić osobno, np.: "
+        "gunicorn backend.wsgi -w 4 -b :8000 oraz uvicorn backend.asgi:application --workers 4 --port 8001."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sync-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--async-url", default="http://127.0.0.1:8001")
+        parser.add_argument(
+            "--paths",
+            nargs="+",
+            default=["publishers/", "games/"],
+            help="ścieżki względem /api/ (wersja async: /api/async/...)",
+        )
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument("--token", help="JWT access token, np. dla library/")
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="wysyła Authorization, więc odpowiedzi katalogu omijają cache (mierzy bazę)",
+        )
+
+    def handle(self, *args, **options):
+        headers = ["Accept: application/json"]
+        if options["token"]:
+            headers.append(f"Authorization: Bearer {options['token']}")
+        elif options["no_cache"]:
+            headers.append("Authorization: none")
+
+        self.stdout.write(
+            f"{'ścieżka':>16} {'wariant':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'błędy':>6}"
+        )
+        for path in options["paths"]:
+            for name, url in (
+                ("wsgi", f"{options['sync_url']}/api/{path}"),
+                ("asgi", f"{options['async_url']}/api/async/{path}"),
+            ):
+                try:
+                    latencies, errors, elapsed = asyncio.run(
+                        run_load(url, headers, options["requests"], options["concurrency"])
+                    )
+                except OSError as exc:
+                    raise CommandError(f"{url}: {exc}")
+                if not latencies:
+                    raise CommandError(f"{url}: brak udanych żądań")
+                latencies.sort()
+                p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+                self.stdout.write(
+                    f"{path:>16} {name:>8} {len(latencies) / elapsed:>9.0f} "
+                    f"{statistics.median(latencies) * 1000:>8.1f} {p99 * 1000:>8.1f} {errors:>6}"
+                )
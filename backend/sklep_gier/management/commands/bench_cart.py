@@ -0,0 +1,74 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from sklep_gier.models import Cart, CartItem, Game, Publisher, User
+from sklep_gier.serializers import CartSerializer
+from sklep_gier.views import get_cart_with_totals
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Porównuje renderowanie koszyka: sumy liczone w Pythonie (leniwe pobieranie gier) "
+        "vs. adnotacje w bazie. Dane testowe są wycofywane po pomiarze."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1, 50, 500])
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'pozycje':>8} {'wariant':>10} {'zapytania':>10} {'ms/żądanie':>12}")
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    user = self.create_cart(size)
+                    for name, render in (("python", self.render_python), ("baza", self.render_annotated)):
+                        queries, ms = self.measure(render, user, options["repeat"])
+                        self.stdout.write(f"{size:>8} {name:>10} {queries:>10} {ms:>12.2f}")
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def create_cart(self, size):
+        publisher = Publisher.objects.create(name="bench-cart-publisher")
+        games = Game.objects.bulk_create(
+            Game(
+                title=f"bench {i}",
+                description="",
+                price=Decimal("19.99") + i,
+                release_date=date(2020, 1, 1),
+                publisher=publisher,
+            )
+            for i in range(size)
+        )
+        user = User.objects.create_user(username="bench-cart", email="bench-cart@example.com", password="x")
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.bulk_create(CartItem(cart=cart, game=game, quantity=2) for game in games)
+        return user
+
+    def render_python(self, user):
+        # dawna ścieżka: suma w pętli po pozycjach, każda pozycja leniwie dociąga swoją grę
+        cart = Cart.objects.get(user=user)
+        cart.total_price = sum(item.quantity * item.game.price for item in cart.cartitem_set.all())
+        return CartSerializer(cart).data
+
+    def render_annotated(self, user):
+        return CartSerializer(get_cart_with_totals(user)).data
+
+    def measure(self, render, user, repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            render(user)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            render(user)
+        elapsed = (time.perf_counter() - start) / repeat
+        return len(ctx.captured_queries), elapsed * 1000
@@ -0,0 +1,83 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from sklep_gier.checkout import checkout_cart
+from sklep_gier.models import Cart, CartItem, Game, Publisher, User
+
+# cache tylko dla pomiaru – podbicia generacji katalogu i wersji bibliotek nie trafiają do wspólnego cache
+BENCH_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "bench-checkout"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Test obciążeniowy checkoutu: równoległe zamówienia wielu użytkowników. "
+        "Działa na osobnej bazie testowej (jak manage.py test), usuwanej po pomiarze – "
+        "wątki mają własne połączenia, więc wycofana transakcja nie wystarczy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--items", type=int, default=5, help="pozycji w koszyku")
+        parser.add_argument("--workers", type=int, default=8)
+
+    def handle(self, *args, **options):
+        # create_test_db przełącza NAME we wspólnym settings_dict, więc połączenia
+        # otwierane w wątkach też trafiają do bazy testowej
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=BENCH_CACHES):
+                self.benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def benchmark(self, options):
+        publisher = Publisher.objects.create(name="bench-checkout-publisher")
+        users = self.create_carts(publisher, options["users"], options["items"])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            latencies = sorted(pool.map(self.timed_checkout, users))
+        elapsed = time.perf_counter() - start
+
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        self.stdout.write(
+            f"{len(users)} zamówień w {elapsed:.2f} s: {len(users) / elapsed:.1f} zamówień/s, "
+            f"p50 {p50:.1f} ms, p99 {p99:.1f} ms ({options['workers']} wątków)"
+        )
+
+    def create_carts(self, publisher, user_count, item_count):
+        games = Game.objects.bulk_create(
+            Game(
+                title=f"bench {i}",
+                description="",
+                price=Decimal("9.99") + i,
+                release_date=date(2020, 1, 1),
+                publisher=publisher,
+            )
+            for i in range(item_count)
+        )
+        users = User.objects.bulk_create(
+            User(username=f"bench-checkout-{i}", email=f"bench-checkout-{i}@example.com")
+            for i in range(user_count)
+        )
+        carts = Cart.objects.bulk_create(Cart(user=user) for user in users)
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, game=game) for cart in carts for game in games
+        )
+        return users
+
+    def timed_checkout(self, user):
+        start = time.perf_counter()
+        try:
+            checkout_cart(user)
+        finally:
+            connection.close()
+        return time.perf_counter() - start
@@ -0,0 +1,90 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from sklep_gier.models import Game, Publisher
+
+
+def pool_available():
+    try:
+        import psycopg  # noqa: F401
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return connection.vendor == "postgresql"
+
+
+class Command(BaseCommand):
+    help = (
+        "Porównuje opóźnienie cyklu żądania (request_started -> zapytania -> request_finished) "
+        "dla nowego połączenia na żądanie, trwałych połączeń (CONN_MAX_AGE) i puli psycopg 3."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--conn-max-age", type=int, default=600)
+
+    def handle(self, *args, **options):
+        variants = [
+            ("bez trwałych", {"CONN_MAX_AGE": 0}, None),
+            ("CONN_MAX_AGE", {"CONN_MAX_AGE": options["conn_max_age"]}, None),
+        ]
+        if pool_available():
+            variants.append(("pula", {"CONN_MAX_AGE": 0}, {"min_size": 2, "max_size": 4}))
+        else:
+            self.stdout.write("Pula pominięta: wymaga PostgreSQL oraz psycopg[pool] (psycopg 3).")
+
+        original = {
+            "CONN_MAX_AGE": connection.settings_dict["CONN_MAX_AGE"],
+            "OPTIONS": dict(connection.settings_dict["OPTIONS"]),
+        }
+        self.stdout.write(f"{'wariant':>14} {'połączenia':>11} {'śr. ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        try:
+            for name, overrides, pool in variants:
+                self.reset_connection()
+                connection.settings_dict.update(overrides)
+                connection.settings_dict["OPTIONS"] = dict(original["OPTIONS"])
+                connection.settings_dict["OPTIONS"].pop("pool", None)
+                if pool is not None:
+                    connection.settings_dict["OPTIONS"]["pool"] = pool
+                opened, latencies = self.measure(options["requests"])
+                latencies.sort()
+                p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+                self.stdout.write(
+                    f"{name:>14} {opened:>11} {statistics.mean(latencies) * 1000:>8.2f} "
+                    f"{statistics.median(latencies) * 1000:>8.2f} {p99 * 1000:>8.2f}"
+                )
+        finally:
+            self.reset_connection()
+            connection.settings_dict.update(original)
+
+    def reset_connection(self):
+        connection.close()
+        if hasattr(connection, "close_pool"):
+            connection.close_pool()
+
+    def measure(self, requests):
+        opened = 0
+
+        def count(sender, **kwargs):
+            nonlocal opened
+            opened += 1
+
+        connection_created.connect(count)
+        latencies = []
+        try:
+            for _ in range(requests):
+                start = time.perf_counter()
+                # ten sam cykl co w handlerze WSGI/ASGI: close_old_connections na początku i końcu
+                request_started.send(sender=self.__class__)
+                list(Publisher.objects.values("id", "name", "website"))
+                Game.objects.exists()
+                request_finished.send(sender=self.__class__)
+                latencies.append(time.perf_counter() - start)
+        finally:
+            connection_created.disconnect(count)
+        return opened, latencies
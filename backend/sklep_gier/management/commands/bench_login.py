@@ -0,0 +1,54 @@
+import time
+
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from sklep_gier.throttling import take_token
+
+PASSWORD = "Haslo123!"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mierzy liczbę weryfikacji hasła na sekundę na jednym rdzeniu dla kolejnych hasherów "
+        "oraz koszt odrzucenia logowania przez LoginThrottle (bez hashowania)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hashers",
+            nargs="+",
+            default=["argon2", "pbkdf2_sha256", "bcrypt_sha256"],
+            help="algorytmy z PASSWORD_HASHERS",
+        )
+        parser.add_argument("--seconds", type=float, default=3.0, help="czas pomiaru na hasher")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'hasher':>24} {'logowań/s/rdzeń':>16} {'ms/logowanie':>13}")
+        for algorithm in options["hashers"]:
+            try:
+                hasher = get_hasher(algorithm)
+                encoded = make_password(PASSWORD, hasher=hasher.algorithm)
+            except (ValueError, ImportError) as exc:
+                self.stdout.write(f"{algorithm:>24} pominięty: {exc}")
+                continue
+            rate = self.measure(lambda: check_password(PASSWORD, encoded), options["seconds"])
+            self.stdout.write(f"{algorithm:>24} {rate:>16.1f} {1000 / rate:>13.2f}")
+
+        # odrzucenie przez kubełek tokenów: odczyt i zapis cache, bez hashowania
+        key = "throttle:login:bench"
+        cache.delete(key)
+        rate = self.measure(lambda: take_token(key, 1, 0.0001), options["seconds"])
+        cache.delete(key)
+        self.stdout.write(f"{'throttle (odrzucenie)':>24} {rate:>16.1f} {1000 / rate:>13.3f}")
+
+    def measure(self, call, seconds):
+        call()
+        count = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline:
+            call()
+            count += 1
+        return count / (time.perf_counter() - start)
@@ -0,0 +1,79 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from sklep_gier.cache import bump_catalog_generation
+from sklep_gier.images import build_cover_variants
+from sklep_gier.models import Game
+
+
+def _build(task):
+    # wykonywane w procesie roboczym – tylko storage, bez bazy danych
+    # (odziedziczone połączenie rodzica nie jest tu nigdy używane)
+    game_id, name = task
+    try:
+        return game_id, build_cover_variants(name), None
+    except (OSError, ValueError) as exc:
+        return game_id, None, str(exc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generuje warianty okładek (WebP/JPEG w kilku szerokościach) dla gier, których "
+        "warianty są nieaktualne, na puli procesów."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="przelicz także aktualne warianty")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="liczba procesów")
+        parser.add_argument("--batch-size", type=int, default=500, help="wierszy na bulk_update")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rows = Game.objects.order_by("id").values_list("id", "cover_image", "cover_variants")
+        updated = failed = 0
+        last_id = 0
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            # porcje po --batch-size wierszy (keyset po id) – w pamięci jest tylko bieżąca porcja,
+            # a każda trafia do bazy od razu, więc przerwane przeliczenie nie traci gotowej pracy
+            while batch := list(rows.filter(id__gt=last_id)[: options["batch_size"]]):
+                last_id = batch[-1][0]
+                tasks, games = [], []
+                for game_id, name, variants in batch:
+                    if not options["all"] and (name or None) == variants.get("source"):
+                        continue
+                    if name:
+                        tasks.append((game_id, name))
+                    elif variants:
+                        games.append(Game(pk=game_id, cover_variants={}))
+
+                for game_id, variants, error in pool.map(_build, tasks, chunksize=8):
+                    if error is not None:
+                        failed += 1
+                        self.stderr.write(f"Gra {game_id}: {error}")
+                        continue
+                    games.append(Game(pk=game_id, cover_variants=variants))
+                self.flush(games)
+                updated += len(games)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Zaktualizowano warianty {updated} gier ({failed} błędów) "
+            f"w {time.perf_counter() - start:.1f} s."
+        ))
+
+    def flush(self, games):
+        if not games:
+            return
+        # zmienia cover_srcset w danych gry – klienci z /api/sync/catalog/ muszą to zobaczyć
+        now = timezone.now()
+        for game in games:
+            game.updated_at = now
+        with transaction.atomic():
+            Game.objects.bulk_update(games, ["cover_variants", "updated_at"])
+            # bulk_update omija sygnały – unieważniamy cache katalogu ręcznie
+            transaction.on_commit(bump_catalog_generation)
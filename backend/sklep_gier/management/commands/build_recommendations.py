@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sklep_gier.cache import bump_catalog_generation
+from sklep_gier.recommendations import rebuild_similarities
+
+
+class Command(BaseCommand):
+    help = (
+        "Przelicza tabelę podobnych gier (top-K sąsiadów) z macierzy współwystąpień "
+        "bibliotek użytkowników. Wymaga NumPy i SciPy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=20)
+        parser.add_argument("--chunk-size", type=int, default=100_000, help="wierszy biblioteki na porcję")
+        parser.add_argument("--batch-size", type=int, default=5_000, help="wierszy na bulk_create")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        written = rebuild_similarities(
+            top_k=options["top_k"],
+            chunk_size=options["chunk_size"],
+            batch_size=options["batch_size"],
+        )
+        # /api/games/{id}/similar/ jest serwowane przez cache katalogu
+        bump_catalog_generation()
+        self.stdout.write(self.style.SUCCESS(
+            f"Zapisano {written} par podobnych gier w {time.perf_counter() - start:.1f} s."
+        ))
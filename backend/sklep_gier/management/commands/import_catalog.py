@@ -0,0 +1,185 @@
+import os
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from sklep_gier.cache import bump_catalog_generation
+from sklep_gier.feeds import FORMATS, GENRE_SEPARATOR, read_rows
+from sklep_gier.models import Game, Genre, Publisher
+from sklep_gier.search import update_search_vectors
+
+GameGenre = Game.genres.through
+# updated_at ustawia auto_now także w bulk_create – musi trafić do DO UPDATE; niezmienione
+# gry w ogóle nie trafiają do upsertu, więc ponowny import nie podbija ich updated_at
+CONTENT_FIELDS = ["title", "description", "price", "release_date"]
+GAME_FIELDS = [*CONTENT_FIELDS, "publisher", "updated_at"]
+# Game.price to DecimalField(max_digits=6, decimal_places=2) – większa cena przerwałaby upsert całej porcji
+MAX_PRICE = Decimal("9999.99")
+
+
+class DryRun(Exception):
+    pass
+
+
+def parse_row(row):
+    """Wiersz feedu -> (external_id, pola gry, nazwa wydawcy, nazwy gatunków). ValueError przy błędach."""
+    external_id = str(row.get("external_id") or "").strip()
+    title = (row.get("title") or "").strip()
+    publisher = (row.get("publisher") or "").strip()
+    if not external_id or not title or not publisher:
+        raise ValueError("wymagane external_id, title i publisher")
+    # brak ceny to błąd feedu, nie darmowa gra – darmowe mają jawne "0"
+    raw_price = row.get("price")
+    if raw_price is None or not str(raw_price).strip():
+        raise ValueError("wymagana cena")
+    try:
+        price = Decimal(str(raw_price).strip()).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ValueError(f"błędna cena {row.get('price')!r}")
+    if not price.is_finite() or not 0 <= price <= MAX_PRICE:
+        raise ValueError(f"cena {row.get('price')!r} poza zakresem 0–{MAX_PRICE}")
+    release_date = date.fromisoformat(str(row.get("release_date") or ""))
+
+    genres = row.get("genres") or []
+    if isinstance(genres, str):
+        genres = genres.split(GENRE_SEPARATOR)
+    # nazwy przycinane do Genre.name (max_length=100), tak jak tytuł i wydawca
+    genres = sorted({name.strip()[:100] for name in genres if name and name.strip()})
+    fields = {
+        "title": title[:255],
+        "description": row.get("description") or "",
+        "price": price,
+        "release_date": release_date,
+    }
+    return external_id, fields, publisher[:255], genres
+
+
+class Command(BaseCommand):
+    help = (
+        "Importuje katalog z feedu CSV/JSONL (także .gz) porcjami: upsert wydawców i gatunków "
+        "po nazwie, upsert gier po external_id i hurtowy zapis powiązań gra-gatunek. "
+        "Kolumny: external_id, title, description, price, release_date, publisher, genres."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="domyślnie z rozszerzenia pliku")
+        parser.add_argument("--batch-size", type=int, default=5_000, help="wierszy na porcję (transakcję)")
+        parser.add_argument("--dry-run", action="store_true", help="wszystkie porcje są wycofywane")
+        parser.add_argument("--max-errors", type=int, default=20, help="ile błędnych wierszy wypisać")
+
+    def handle(self, *args, **options):
+        if not os.path.isfile(options["path"]):
+            raise CommandError(f"Brak pliku {options['path']}")
+
+        self.dry_run = options["dry_run"]
+        # nazwa -> id; przy dry-run czyszczone po każdej porcji, bo wstawione wiersze znikają
+        self.publishers, self.genres = {}, {}
+        self.stats = dict.fromkeys(("rows", "created", "updated", "unchanged", "invalid"), 0)
+        self.max_errors = options["max_errors"]
+
+        start = time.perf_counter()
+        rows = enumerate(read_rows(options["path"], options["format"]), start=1)
+        while batch := list(islice(rows, options["batch_size"])):
+            try:
+                with transaction.atomic():
+                    self.import_batch(batch)
+                    if self.dry_run:
+                        raise DryRun
+            except DryRun:
+                self.publishers, self.genres = {}, {}
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                "{rows} wierszy: {created} nowych, {updated} zaktualizowanych, {unchanged} bez zmian, "
+                "{invalid} błędnych".format(**self.stats)
+                + f", {self.stats['rows'] / elapsed:.0f} wierszy/s"
+            )
+
+        if not self.dry_run and self.stats["created"] + self.stats["updated"]:
+            # bulk_create/bulk_update omijają sygnały – cache katalogu unieważniamy ręcznie
+            bump_catalog_generation()
+        prefix = "[dry-run] " if self.dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Zaimportowano {self.stats['created']} nowych i {self.stats['updated']} "
+            f"zaktualizowanych gier ({self.stats['unchanged']} bez zmian) w {time.perf_counter() - start:.1f} s."
+        ))
+
+    def import_batch(self, batch):
+        parsed = {}
+        for line, row in batch:
+            self.stats["rows"] += 1
+            try:
+                external_id, fields, publisher, genres = parse_row(row)
+            except (ValueError, TypeError, AttributeError) as exc:
+                self.stats["invalid"] += 1
+                if self.stats["invalid"] <= self.max_errors:
+                    self.stderr.write(f"Wiersz {line}: {exc}")
+                continue
+            # powtórzony external_id w porcji – wygrywa ostatni wiersz
+            parsed[external_id] = (fields, publisher, genres)
+        if not parsed:
+            return
+
+        publishers = self.upsert_names(Publisher, self.publishers, {p for _, p, _ in parsed.values()})
+        genres = self.upsert_names(Genre, self.genres, {g for _, _, names in parsed.values() for g in names})
+
+        current = self.current_state(parsed)
+        games, genre_ids = [], {}
+        for external_id, (fields, publisher, names) in parsed.items():
+            state = (*(fields[field] for field in CONTENT_FIELDS), publishers[publisher])
+            genre_ids[external_id] = {genres[name] for name in names}
+            if external_id in current:
+                if current[external_id] == (state, genre_ids[external_id]):
+                    # bez zapisu – updated_at (eksport i /api/sync/catalog/) zostaje nietknięty
+                    self.stats["unchanged"] += 1
+                    continue
+                self.stats["updated"] += 1
+            else:
+                self.stats["created"] += 1
+            games.append(Game(external_id=external_id, publisher_id=publishers[publisher], **fields))
+        if not games:
+            return
+
+        # jeden INSERT ... ON CONFLICT (external_id) DO UPDATE na porcję, tylko nowe i zmienione gry
+        Game.objects.bulk_create(
+            games,
+            update_conflicts=True,
+            unique_fields=["external_id"],
+            update_fields=GAME_FIELDS,
+        )
+        game_ids = {game.external_id: game.pk for game in games}
+        if None in game_ids.values():
+            # baza nie zwraca id z upsertu – dociągamy je jednym zapytaniem
+            game_ids = dict(Game.objects.filter(external_id__in=game_ids).values_list("external_id", "id"))
+
+        # powiązania z gatunkami zastępowane w całości dla zapisanych gier
+        GameGenre.objects.filter(game_id__in=game_ids.values()).delete()
+        GameGenre.objects.bulk_create(
+            GameGenre(game_id=game_ids[external_id], genre_id=genre_id)
+            for external_id in game_ids
+            for genre_id in genre_ids[external_id]
+        )
+        update_search_vectors(game_ids.values())
+
+    def current_state(self, parsed):
+        """external_id -> ((pola gry, id wydawcy), id gatunków) dla gier z porcji, które już są w bazie."""
+        rows = Game.objects.filter(external_id__in=parsed).values_list(
+            "external_id", "id", *CONTENT_FIELDS, "publisher_id"
+        )
+        states = {external_id: (game_id, tuple(state)) for external_id, game_id, *state in rows}
+        genre_ids = {game_id: set() for game_id, _ in states.values()}
+        for game_id, genre_id in GameGenre.objects.filter(game_id__in=genre_ids).values_list("game_id", "genre_id"):
+            genre_ids[game_id].add(genre_id)
+        return {external_id: (state, genre_ids[game_id]) for external_id, (game_id, state) in states.items()}
+
+    def upsert_names(self, model, known, names):
+        """Id wydawców/gatunków po unikalnej nazwie; brakujące wstawiane z ignore_conflicts."""
+        missing = names - known.keys()
+        if missing:
+            model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+            known.update(model.objects.filter(name__in=missing).values_list("name", "id"))
+        return known
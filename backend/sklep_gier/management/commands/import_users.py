@@ -0,0 +1,161 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db.models.functions import Upper
+
+from sklep_gier.feeds import FORMATS, read_rows
+from sklep_gier.models import User
+
+FIELDS = ("email", "password", "password_hash", "nickname", "first_name", "last_name", "birth_date")
+# pola tekstowe z limitem długości w modelu User – dłuższe wartości przerwałyby bulk_create całej porcji
+MAX_LENGTHS = {"email": 254, "nickname": 150, "first_name": 150, "last_name": 150}
+
+
+def _hash_password(password):
+    # wykonywane w procesie roboczym
+    return make_password(password)
+
+
+def _is_usable_hash(value):
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_user(row):
+    """Wiersz feedu -> niezapisany User (hasło jawne czeka w ``_raw_password``). ValueError przy błędach."""
+    row = {field: (row.get(field) or "").strip() for field in FIELDS}
+    email = User.objects.normalize_email(row["email"])
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise ValueError(f"błędny e-mail {row['email']!r}")
+    for field, max_length in MAX_LENGTHS.items():
+        if len(row[field]) > max_length:
+            raise ValueError(f"{field} dłuższe niż {max_length} znaków")
+    if not row["password"] and not row["password_hash"]:
+        raise ValueError("wymagane password albo password_hash")
+    if row["password_hash"] and not _is_usable_hash(row["password_hash"]):
+        raise ValueError("nierozpoznany format password_hash")
+    try:
+        birth_date = date.fromisoformat(row["birth_date"]) if row["birth_date"] else None
+    except ValueError:
+        raise ValueError(f"błędna data urodzenia {row['birth_date']!r}")
+
+    user = User(
+        email=email,
+        username=row["nickname"] or None,
+        first_name=row["first_name"],
+        last_name=row["last_name"],
+        birth_date=birth_date,
+        password=row["password_hash"],
+    )
+    user._raw_password = None if row["password_hash"] else row["password"]
+    return user
+
+
+class Command(BaseCommand):
+    help = (
+        "Importuje użytkowników z CSV/JSONL (kolumny: email, password lub password_hash, nickname, "
+        "first_name, last_name, birth_date). Hasła jawne są hashowane równolegle na puli procesów, "
+        "gotowe skróty w formacie Django (np. pbkdf2_sha256$...) zapisywane bez zmian – zostaną "
+        "przeliczone do Argon2 przy pierwszym logowaniu. Istniejący e-mail lub nickname są pomijane."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="domyślnie z rozszerzenia pliku")
+        parser.add_argument("--batch-size", type=int, default=5_000, help="wierszy na bulk_create")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="procesy hashujące")
+        parser.add_argument("--max-errors", type=int, default=20, help="ile błędnych wierszy wypisać")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError(f"Brak pliku {path}")
+
+        start = time.perf_counter()
+        rows = enumerate(read_rows(path, options["format"]), start=1)
+        self.max_errors = options["max_errors"]
+        total = created = self.invalid = 0
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            while batch := list(islice(rows, options["batch_size"])):
+                users = self.exclude_existing(self.build_users(batch))
+                self.hash_passwords(users, pool)
+                # ignore_conflicts na wypadek równoległej rejestracji tego samego e-maila
+                User.objects.bulk_create(users, ignore_conflicts=True)
+                total += len(batch)
+                created += self.count_inserted(users)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{total} wierszy, {created} utworzonych, {self.invalid} błędnych, "
+                    f"{total / elapsed:.0f} wierszy/s"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Zaimportowano {created} z {total} użytkowników ({total - created - self.invalid} już istniało, "
+            f"{self.invalid} błędnych) w {time.perf_counter() - start:.1f} s."
+        ))
+
+    def build_users(self, batch):
+        """Niezapisane obiekty User z poprawnych wierszy; błędne są liczone i wypisywane na stderr."""
+        users = []
+        for line, row in batch:
+            try:
+                users.append(parse_user(row))
+            except (ValueError, TypeError, AttributeError) as exc:
+                self.invalid += 1
+                if self.invalid <= self.max_errors:
+                    self.stderr.write(f"Wiersz {line}: {exc}")
+        return users
+
+    def exclude_existing(self, users):
+        """
+        Pomija duplikaty w porcji i konta już istniejące w bazie (dwa zapytania po indeksach
+        unikalności) – przed hashowaniem, żeby nie liczyć skrótów dla pomijanych wierszy.
+        """
+        emails = [user.email.upper() for user in users]
+        nicknames = [user.username for user in users if user.username]
+        taken_emails = set(
+            User.objects.annotate(email_upper=Upper("email"))
+            .filter(email_upper__in=emails)
+            .values_list("email_upper", flat=True)
+        )
+        taken_nicknames = set(User.objects.filter(username__in=nicknames).values_list("username", flat=True))
+
+        fresh = []
+        for user in users:
+            email = user.email.upper()
+            if email in taken_emails or user.username in taken_nicknames:
+                continue
+            taken_emails.add(email)
+            if user.username:
+                taken_nicknames.add(user.username)
+            fresh.append(user)
+        return fresh
+
+    def count_inserted(self, users):
+        """
+        Ile kont z porcji faktycznie zapisano – ignore_conflicts po cichu pomija konflikty,
+        a bulk_create nie zwraca wtedy id. Skróty haseł mają losową sól, więc para
+        (e-mail, hasło) w bazie jednoznacznie wskazuje wiersze wstawione przez ten import.
+        """
+        ours = {(user.email, user.password) for user in users}
+        stored = User.objects.filter(email__in=[user.email for user in users]).values_list("email", "password")
+        return len(ours.intersection(stored))
+
+    def hash_passwords(self, users, pool):
+        plain = [user for user in users if user._raw_password is not None]
+        encoded = pool.map(_hash_password, [user._raw_password for user in plain], chunksize=64)
+        for user, password in zip(plain, encoded):
+            user.password = password
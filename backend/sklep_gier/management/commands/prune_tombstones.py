@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from sklep_gier.models import CatalogTombstone
+from sklep_gier.sync import tombstone_horizon
+
+
+class Command(BaseCommand):
+    help = (
+        "Usuwa ślady usuniętych obiektów katalogu starsze niż SYNC_TOMBSTONE_RETENTION_DAYS. "
+        "Klienci z ?since= sprzed tego okna dostają w /api/sync/catalog/ pełną listę (full)."
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = CatalogTombstone.objects.filter(deleted_at__lt=tombstone_horizon()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Usunięto {deleted} tombstone'ów."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from sklep_gier.cache import bump_catalog_generation
+from sklep_gier.models import Game, Review
+from sklep_gier.reviews import HISTOGRAM_FIELDS, RATING_FIELDS, game_with_ratings, review_aggregates
+
+
+class Command(BaseCommand):
+    help = "Przelicza od zera zdenormalizowane agregaty recenzji (średnia, liczba, histogram) na grach."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        updated = 0
+        with transaction.atomic():
+            Game.objects.update(rating_avg=0, rating_count=0, **dict.fromkeys(HISTOGRAM_FIELDS, 0))
+
+            batch = []
+            for row in review_aggregates(Review.objects.all()).iterator(chunk_size=batch_size):
+                batch.append(game_with_ratings(row))
+                if len(batch) >= batch_size:
+                    Game.objects.bulk_update(batch, RATING_FIELDS)
+                    updated += len(batch)
+                    batch = []
+            Game.objects.bulk_update(batch, RATING_FIELDS)
+            updated += len(batch)
+
+            # bulk_update omija sygnały – unieważniamy cache katalogu ręcznie
+            transaction.on_commit(bump_catalog_generation)
+
+        self.stdout.write(self.style.SUCCESS(f"Przeliczono agregaty dla {updated} gier z recenzjami."))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sklep_gier.cache import bump_catalog_generation
+from sklep_gier.recommendations import apply_library_changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Nanosi zdarzenia z dziennika zmian bibliotek na liczniki współwystąpień i przelicza "
+        "top-K tylko zmienionych gier. Do uruchamiania co kilka minut (cron); pełne "
+        "przeliczenie to build_recommendations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=10_000, help="zdarzeń na porcję (transakcję)")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        events = games = 0
+        while True:
+            processed, affected = apply_library_changes(
+                top_k=options["top_k"],
+                batch_size=options["batch_size"],
+            )
+            if not processed:
+                break
+            events += processed
+            games += affected
+
+        if games:
+            # /api/games/{id}/similar/ jest serwowane przez cache katalogu
+            bump_catalog_generation()
+        self.stdout.write(self.style.SUCCESS(
+            f"Przetworzono {events} zdarzeń, przeliczono {games} gier w {time.perf_counter() - start:.1f} s."
+        ))
@@ -0,0 +1,149 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+# Skompresowane wcześniej warianty (plik.br / plik.gz obok oryginału), w kolejności preferencji
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def _is_immutable(path):
+    # nazwy z hashem treści (np. warianty okładek) nigdy nie zmieniają zawartości
+    return path.startswith(tuple(settings.MEDIA_IMMUTABLE_PREFIXES))
+
+
+def _select_encoding(request, fullpath):
+    accepted = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    for encoding, suffix in PRECOMPRESSED:
+        if encoding in accepted and os.path.isfile(fullpath + suffix):
+            return encoding, fullpath + suffix
+    return None, fullpath
+
+
+def _parse_range(header, size):
+    """
+    Pojedynczy zakres ``bytes=a-b`` / ``bytes=a-`` / ``bytes=-n`` jako (start, koniec włącznie).
+    None – nagłówek do zignorowania (np. wiele zakresów), ValueError – zakres poza plikiem.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(response, path, filepath, suffix):
+    """
+    Przekazanie wysyłki pliku serwerowi WWW: nginx (X-Accel-Redirect na lokację internal)
+    albo Apache/lighttpd (X-Sendfile ze ścieżką). Serwer obsługuje też Range.
+    """
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT.rstrip("/") + "/" + path + suffix
+    else:
+        response[settings.MEDIA_SENDFILE_HEADER] = filepath
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Pliki z MEDIA_ROOT dla produkcji: nagłówki cache (immutable dla nazw z hashem),
+    ETag/Last-Modified z 304, warianty .br/.gz, pojedyncze zakresy Range (206/416)
+    oraz opcjonalne oddanie wysyłki serwerowi WWW (MEDIA_ACCEL_REDIRECT / MEDIA_SENDFILE_HEADER).
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    encoding, filepath = _select_encoding(request, fullpath)
+    stat = os.stat(filepath)
+    size, last_modified = stat.st_size, int(stat.st_mtime)
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{size:x}{'-' + encoding if encoding else ''}")
+    content_type = mimetypes.guess_type(fullpath)[0] or "application/octet-stream"
+
+    def with_headers(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Accept-Ranges"] = "bytes"
+        if _is_immutable(path):
+            patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return with_headers(not_modified)
+
+    if settings.MEDIA_ACCEL_REDIRECT or settings.MEDIA_SENDFILE_HEADER:
+        response = HttpResponse(content_type=content_type)
+        if encoding:
+            response["Content-Encoding"] = encoding
+        return with_headers(_offload(response, path, filepath, filepath[len(fullpath):]))
+
+    byte_range = None
+    if "HTTP_RANGE" in request.META and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = _parse_range(request.META["HTTP_RANGE"], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return with_headers(response)
+
+    if byte_range is None:
+        # FileResponse korzysta z wsgi.file_wrapper (sendfile), jeśli serwer go udostępnia
+        response = FileResponse(open(filepath, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(filepath, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return with_headers(response)
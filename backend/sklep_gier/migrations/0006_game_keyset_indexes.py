@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklep_gier', '0005_alter_user_email_alter_user_username'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['release_date', 'id'], name='game_release_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['price', 'id'], name='game_price_id_idx'),
+        ),
+    ]
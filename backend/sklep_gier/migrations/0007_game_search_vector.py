@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:34
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Indeksy GIN i wypełnienie wektora istnieją tylko na PostgreSQL;
+# na innych bazach wyszukiwanie korzysta ze ścieżki zastępczej (search.py).
+CREATE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS game_search_vector_gin ON sklep_gier_game USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS game_title_trgm_gin ON sklep_gier_game USING gin (title gin_trgm_ops)",
+]
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS game_search_vector_gin",
+    "DROP INDEX IF EXISTS game_title_trgm_gin",
+]
+BACKFILL = """
+UPDATE sklep_gier_game g SET search_vector =
+    setweight(to_tsvector('simple', g.title), 'A')
+    || setweight(to_tsvector('simple', coalesce(p.name, '')), 'B')
+    || setweight(to_tsvector('simple', coalesce((
+        SELECT string_agg(ge.name, ' ')
+        FROM sklep_gier_game_genres gg
+        JOIN sklep_gier_genre ge ON ge.id = gg.genre_id
+        WHERE gg.game_id = g.id
+    ), '')), 'B')
+    || setweight(to_tsvector('simple', g.description), 'C')
+FROM sklep_gier_publisher p
+WHERE p.id = g.publisher_id
+"""
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for sql in CREATE_INDEXES:
+        schema_editor.execute(sql)
+    schema_editor.execute(BACKFILL)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for sql in DROP_INDEXES:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklep_gier', '0006_game_keyset_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='game',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
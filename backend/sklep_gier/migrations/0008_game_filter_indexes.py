@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklep_gier', '0007_game_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['publisher', 'release_date'], name='game_publisher_release_idx'),
+        ),
+        # Automatyczna tabela pośrednia Game.genres ma tylko unikalne (game_id, genre_id);
+        # filtr po gatunkach i liczniki potrzebują odwrotnej kolejności kolumn.
+        migrations.RunSQL(
+            'CREATE INDEX game_genres_genre_game_idx ON sklep_gier_game_genres (genre_id, game_id)',
+            'DROP INDEX game_genres_genre_game_idx',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:40
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    """Scala zdublowane pozycje (ten sam koszyk i gra) w jedną z sumą ilości."""
+    CartItem = apps.get_model('sklep_gier', 'CartItem')
+    duplicates = (
+        CartItem.objects.values('cart_id', 'game_id')
+        .annotate(rows=Count('id'), keep=Min('id'), total=Sum('quantity'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates:
+        CartItem.objects.filter(pk=dup['keep']).update(quantity=dup['total'])
+        CartItem.objects.filter(cart_id=dup['cart_id'], game_id=dup['game_id']).exclude(pk=dup['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklep_gier', '0008_game_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cart_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'game'), name='cartitem_unique_cart_game'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:45
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_review_aggregates(apps, schema_editor):
+    Game = apps.get_model('sklep_gier', 'Game')
+    Review = apps.get_model('sklep_gier', 'Review')
+    rows = Review.objects.order_by().values('game_id').annotate(
+        count=Count('id'),
+        **{f'rating_{r}': Count('id', filter=Q(rating=r)) for r in range(1, 6)},
+    )
+    for row in rows.iterator():
+        weighted = sum(r * row[f'rating_{r}'] for r in range(1, 6))
+        Game.objects.filter(pk=row['game_id']).update(
+            rating_count=row['count'],
+            rating_avg=round(weighted / row['count'], 2),
+            **{f'rating_{r}': row[f'rating_{r}'] for r in range(1, 6)},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklep_gier', '0010_order_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='rating',
+            field=models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['rating_avg', 'id'], name='game_rating_id_idx'),
+        ),
+        migrations.RunPython(backfill_review_aggregates, migrations.RunPython.noop),
+    ]
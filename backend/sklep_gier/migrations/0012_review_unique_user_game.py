@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:46
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def remove_duplicate_reviews(apps, schema_editor):
+    """Zostawia najnowszą recenzję użytkownika dla gry i przelicza agregaty dotkniętych gier."""
+    Game = apps.get_model('sklep_gier', 'Game')
+    Review = apps.get_model('sklep_gier', 'Review')
+    duplicates = list(
+        Review.objects.values('user_id', 'game_id')
+        .annotate(rows=Count('id'), keep=Max('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates:
+        Review.objects.filter(user_id=dup['user_id'], game_id=dup['game_id']).exclude(pk=dup['keep']).delete()
+
+    game_ids = {dup['game_id'] for dup in duplicates}
+    rows = Review.objects.filter(game_id__in=game_ids).order_by().values('game_id').annotate(
+        count=Count('id'),
+        **{f'rating_{r}': Count('id', filter=Q(rating=r)) for r in range(1, 6)},
+    )
+    for row in rows:
+        weighted = sum(r * row[f'rating_{r}'] for r in range(1, 6))
+        Game.objects.filter(pk=row['game_id']).update(
+            rating_count=row['count'],
+            rating_avg=round(weighted / row['count'], 2),
+            **{f'rating_{r}': row[f'rating_{r}'] for r in range(1, 6)},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklep_gier', '0011_game_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['game', 'created_at', 'id'], name='review_game_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('user', 'game'), name='review_unique_user_game'),
+        ),
+    ]
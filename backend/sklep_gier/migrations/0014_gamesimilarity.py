@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklep_gier', '0013_order_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='sklep_gier.game')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_entries', to='sklep_gier.game')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('game', 'rank'), name='gamesimilarity_unique_game_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklep_gier', '0014_gamesimilarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField()),
+                ('game_id', models.BigIntegerField()),
+                ('delta', models.SmallIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GameCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sklep_gier.game')),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sklep_gier.game')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('game', 'other'), name='gamecooccurrence_unique_pair')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklep_gier', '0015_recommendation_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='cover_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
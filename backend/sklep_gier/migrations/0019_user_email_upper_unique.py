@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:07
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import Upper
+
+
+def resolve_case_duplicate_emails(apps, schema_editor):
+    """
+    E-maile różniące się tylko wielkością liter: zostaje konto logowane ostatnio (przy remisie
+    najstarsze), pozostałe dostają zastępczy e-mail "duplicate-<id>+<e-mail>" i są dezaktywowane.
+    Zamówienia i biblioteki zostają przy swoich kontach – do ręcznego scalenia.
+    """
+    User = apps.get_model('sklep_gier', 'User')
+    users = User.objects.annotate(email_upper=Upper('email'))
+    duplicates = list(
+        users.values('email_upper')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+        .values_list('email_upper', flat=True)
+    )
+    for email_upper in duplicates:
+        accounts = users.filter(email_upper=email_upper).order_by(F('last_login').desc(nulls_last=True), 'id')
+        for user in list(accounts)[1:]:
+            User.objects.filter(pk=user.pk).update(
+                email=f'duplicate-{user.pk}+{user.email}'[:254],
+                is_active=False,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('sklep_gier', '0018_user_email_upper_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_case_duplicate_emails, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_email_upper_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('email'), name='user_email_upper_unique'),
+        ),
+    ]
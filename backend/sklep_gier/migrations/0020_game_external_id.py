@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklep_gier', '0019_user_email_upper_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
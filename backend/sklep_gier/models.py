@@ -1,5 +1,13 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import connections, models
+from django.db.models.functions import Coalesce, Upper
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
+
+from .cache import invalidate_auth_state_on_commit
 
 # Użytkownik
 class User(AbstractUser):
@@ -15,19 +23,35 @@ class User(AbstractUser):
     birth_date = models.DateField(null=True, blank=True)
 
     library = models.ManyToManyField("Game", related_name="owned_by")
+    # wersja tokenów JWT (claim "ver") – podbicie unieważnia wszystkie wydane tokeny
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = "email"       
     REQUIRED_FIELDS = ["username"]  
 
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # e-mail unikalny bez względu na wielkość liter (rejestracja opiera się na tym ograniczeniu);
+            # jego indeks obsługuje też logowanie po email__iexact – PostgreSQL dopasowuje UPPER("email"::text)
+            models.UniqueConstraint(Upper("email"), name="user_email_upper_unique"),
+        ]
+
     def __str__(self):
         return self.email
 
+    def revoke_tokens(self):
+        """Unieważnia wszystkie tokeny użytkownika (np. po zmianie hasła lub wylogowaniu wszędzie)."""
+        User.objects.filter(pk=self.pk).update(token_version=models.F("token_version") + 1)
+        self.refresh_from_db(fields=["token_version"])
+        invalidate_auth_state_on_commit(self.pk)
+
 
 
 # Wydawca
 class Publisher(models.Model):
     name = models.CharField(max_length=255, unique=True)
     website = models.URLField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -35,12 +59,24 @@ class Publisher(models.Model):
 # Gatunek
 class Genre(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
 
 # Gra
+class GameQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Dociąga wydawcę i gatunki – wszystko, czego potrzebuje GameSerializer.
+        Wektor wyszukiwania nie jest serializowany, więc go nie pobieramy.
+        """
+        return self.select_related("publisher").prefetch_related("genres").defer("search_vector")
+
+
 class Game(models.Model):
+    # identyfikator gry w feedzie wydawcy – klucz upsertu w import_catalog
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
     title = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=6, decimal_places=2)
@@ -48,6 +84,33 @@ class Game(models.Model):
     publisher = models.ForeignKey(Publisher, on_delete=models.CASCADE)
     genres = models.ManyToManyField(Genre)
     cover_image = models.ImageField(upload_to='game_covers/', blank=True)
+    # przeskalowane warianty okładki z adresami (images.py), liczone przy zapisie lub build_cover_variants
+    cover_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # utrzymywany przez sygnały (signals.py), indeks GIN zakładany w migracji 0007
+    search_vector = SearchVectorField(null=True, editable=False)
+    # zdenormalizowane agregaty recenzji, aktualizowane przy każdej zmianie Review (reviews.py)
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
+    # czas ostatniej zmiany czegokolwiek z GameSerializer (eksport i /api/sync/catalog/)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = GameQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # pod stronicowanie kluczowe katalogu (GameKeysetPagination)
+            models.Index(fields=["release_date", "id"], name="game_release_id_idx"),
+            models.Index(fields=["price", "id"], name="game_price_id_idx"),
+            # filtr wydawcy + zakres dat wydania
+            models.Index(fields=["publisher", "release_date"], name="game_publisher_release_idx"),
+            # sortowanie i filtrowanie po ocenie
+            models.Index(fields=["rating_avg", "id"], name="game_rating_id_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -56,29 +119,163 @@ class Game(models.Model):
 class Review(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     game = models.ForeignKey(Game, on_delete=models.CASCADE)
-    rating = models.PositiveIntegerField()
+    rating = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # jedna recenzja na użytkownika i grę – duplikaty zawyżałyby agregaty
+            models.UniqueConstraint(fields=["user", "game"], name="review_unique_user_game"),
+        ]
+        indexes = [
+            # stronicowanie kluczowe recenzji gry (ReviewKeysetPagination)
+            models.Index(fields=["game", "created_at", "id"], name="review_game_created_idx"),
+        ]
+
+# Kwoty koszyka liczone w bazie (ilość * cena) – dokładne, bez pętli w Pythonie
+def cart_amount_field():
+    return models.DecimalField(max_digits=12, decimal_places=2)
+
+
 # Koszyk
+class CartQuerySet(models.QuerySet):
+    def with_total_price(self):
+        total = models.Sum(
+            models.F("cartitem__quantity") * models.F("cartitem__game__price"),
+            output_field=cart_amount_field(),
+        )
+        zero = models.Value(Decimal("0.00"))
+        return self.annotate(total_price=Coalesce(total, zero, output_field=cart_amount_field()))
+
+
 class Cart(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
+    # wersja zawartości (ETag koszyka); podbijana przy każdej zmianie pod blokadą wiersza koszyka
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CartQuerySet.as_manager()
+
+    def bump_version(self):
+        """Podbija wersję koszyka; wywoływać w transakcji, po select_for_update na tym wierszu."""
+        Cart.objects.filter(pk=self.pk).update(version=models.F("version") + 1)
+        self.version += 1
 
 # Pozycja w koszyku
+class CartItemQuerySet(models.QuerySet):
+    def with_subtotals(self):
+        subtotal = models.F("quantity") * models.F("game__price")
+        return self.annotate(subtotal=models.ExpressionWrapper(subtotal, output_field=cart_amount_field()))
+
+    def add_quantity(self, cart, game_id, quantity):
+        """
+        Dodaje grę do koszyka albo zwiększa ilość istniejącej pozycji jednym poleceniem
+        INSERT ... ON CONFLICT DO UPDATE (PostgreSQL, SQLite) – bez wyścigu między
+        odczytem a zapisem. Zwraca id pozycji albo None, jeśli gra nie istnieje lub
+        nowa ilość przekroczyłaby CartItem.MAX_QUANTITY. Polecenie omija sygnały post_save.
+        """
+        item_table = self.model._meta.db_table
+        game_table = Game._meta.db_table
+        sql = f"""
+            INSERT INTO {item_table} (cart_id, game_id, quantity)
+            SELECT %s, id, %s FROM {game_table} WHERE id = %s
+            ON CONFLICT (cart_id, game_id)
+            DO UPDATE SET quantity = {item_table}.quantity + EXCLUDED.quantity
+            WHERE {item_table}.quantity <= %s - EXCLUDED.quantity
+            RETURNING id
+        """
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, [cart.pk, quantity, game_id, self.model.MAX_QUANTITY])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+
 class CartItem(models.Model):
+    # gry są cyfrowe – więcej sztuk to tylko kopie na prezent; limit trzyma też sumy
+    # zamówienia w zakresie kolumn (Order.total_price)
+    MAX_QUANTITY = 99
+
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE)
     game = models.ForeignKey(Game, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    objects = CartItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cart", "game"], name="cartitem_unique_cart_game"),
+        ]
+
 # Zamówienie
 class Order(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     total_price = models.DecimalField(max_digits=8, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=50, default='pending')  # np. pending, completed
+    # klucz z nagłówka Idempotency-Key – ponowione żądanie checkout zwraca to samo zamówienie
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "idempotency_key"], name="order_unique_idempotency_key"),
+        ]
+        indexes = [
+            # historia zamówień użytkownika (OrderKeysetPagination)
+            models.Index(fields=["user", "created_at", "id"], name="order_user_created_idx"),
+            # zadania w tle wyszukujące zaległe zamówienia oczekujące
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status="pending"),
+                name="order_pending_created_idx",
+            ),
+        ]
 
 # Pozycja zamówienia (snapshot ceny)
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
     game = models.ForeignKey(Game, on_delete=models.CASCADE)
     price_snapshot = models.DecimalField(max_digits=6, decimal_places=2)
+
+
+# Podobne gry ("gracze, którzy mają tę grę, mają też...") – top-K sąsiadów per gra,
+# przeliczane offline z biblioteki użytkowników (recommendations.py)
+class GameSimilarity(models.Model):
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="similarities")
+    similar = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="neighbour_entries")
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # służy też jako indeks pod odczyt sąsiadów gry w kolejności rangi
+            models.UniqueConstraint(fields=["game", "rank"], name="gamesimilarity_unique_game_rank"),
+        ]
+
+
+# Liczniki współwystąpień gier w bibliotekach (obie kolejności pary; para (g, g) to liczba
+# właścicieli gry) – baza dla przyrostowego przeliczania GameSimilarity
+class GameCooccurrence(models.Model):
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="+")
+    other = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="+")
+    count = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["game", "other"], name="gamecooccurrence_unique_pair"),
+        ]
+
+
+# Dziennik zmian bibliotek (+1 dodanie, -1 usunięcie) do przetworzenia przez update_recommendations.
+# Celowo bez kluczy obcych – zapis ma być tani, a zdarzenie przeżywa usunięcie gry/użytkownika.
+class LibraryChangeEvent(models.Model):
+    user_id = models.BigIntegerField()
+    game_id = models.BigIntegerField()
+    delta = models.SmallIntegerField()
+
+
+# Ślad po usuniętej grze/wydawcy/gatunku – /api/sync/catalog/ zwraca je jako "deleted".
+# Bez klucza obcego (obiektu już nie ma); starsze niż SYNC_TOMBSTONE_RETENTION_DAYS usuwa prune_tombstones.
+class CatalogTombstone(models.Model):
+    kind = models.CharField(max_length=16)  # game, publisher, genre
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
@@ -0,0 +1,172 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Stronicowanie kluczowe (keyset).
+
+    Kursor zapamiętuje parę (wartość pola sortowania, id) ostatniego rekordu na
+    stronie, więc kolejna strona to zwykły WHERE po indeksie zamiast OFFSET.
+    Podklasy podają dozwolone sortowania w ``orderings``.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+    page_size = 24
+    max_page_size = 100
+    default_ordering = None
+    # dozwolone sortowania -> (pole, konwersja wartości z kursora)
+    orderings = {}
+    invalid_cursor_message = "Invalid cursor"
+
+    def is_enabled(self, request):
+        return True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_enabled(request):
+            return None
+
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        self.limit = self.get_page_size(request)
+        field, _ = self.orderings[self.ordering]
+        descending = self.ordering.startswith("-")
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, pk = cursor
+            op = "lt" if descending else "gt"
+            # (pole, id) > (v, pk) rozpisane na OR; nadmiarowy warunek pole >= v (<= v)
+            # daje planerowi granicę zakresu na indeksie (pole, id) – bez niego głębokie
+            # strony skanują indeks od początku, jak przy OFFSET
+            queryset = queryset.filter(
+                Q(**{f"{field}__{op}e": value}),
+                Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": pk}),
+            )
+
+        if descending:
+            queryset = queryset.order_by(f"-{field}", "-id")
+        else:
+            queryset = queryset.order_by(field, "id")
+
+        # pobieramy jeden rekord więcej, żeby wiedzieć, czy istnieje następna strona
+        page = list(queryset[: self.limit + 1])
+        self.has_next = len(page) > self.limit
+        self.page = page[: self.limit]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering not in self.orderings:
+            return self.default_ordering
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        field, _ = self.orderings[self.ordering]
+        # strona może zawierać obiekty modelu albo słowniki z .values()
+        if isinstance(last, dict):
+            value, pk = last[field], last["id"]
+        else:
+            value, pk = getattr(last, field), last.pk
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.ordering_query_param, self.ordering)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(value, pk))
+
+    def encode_cursor(self, value, pk):
+        payload = json.dumps({"o": self.ordering, "v": str(value), "i": pk}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            # kursor jest ważny tylko dla sortowania, w którym został wydany
+            if payload["o"] != self.ordering:
+                raise ValueError
+            _, convert = self.orderings[self.ordering]
+            return convert(payload["v"]), int(payload["i"])
+        except (binascii.Error, KeyError, TypeError, ValueError, InvalidOperation):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class GameKeysetPagination(KeysetPagination):
+    """
+    Katalog gier po dacie wydania, cenie lub ocenie.
+    Tryb jest włączany parametrem ``cursor`` lub ``page_size`` – bez nich
+    lista zachowuje się jak dotychczas.
+    """
+
+    default_ordering = "-release_date"
+    orderings = {
+        "release_date": ("release_date", date.fromisoformat),
+        "-release_date": ("release_date", date.fromisoformat),
+        "price": ("price", Decimal),
+        "-price": ("price", Decimal),
+        "rating": ("rating_avg", Decimal),
+        "-rating": ("rating_avg", Decimal),
+    }
+
+    def is_enabled(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+
+class ReviewKeysetPagination(KeysetPagination):
+    """Recenzje gry, najnowsze najpierw (indeks Review(game, created_at, id))."""
+
+    page_size = 20
+    default_ordering = "-created_at"
+    orderings = {
+        "-created_at": ("created_at", datetime.fromisoformat),
+    }
+
+
+class OrderKeysetPagination(KeysetPagination):
+    """Historia zamówień użytkownika, najnowsze najpierw (indeks Order(user, created_at, id))."""
+
+    page_size = 20
+    default_ordering = "-created_at"
+    orderings = {
+        "-created_at": ("created_at", datetime.fromisoformat),
+    }
@@ -0,0 +1,315 @@
+"""
+Rekomendacje "gracze, którzy mają tę grę, mają też..." z biblioteki użytkowników.
+
+Zadanie offline (``manage.py build_recommendations``) liczy rzadką macierz
+współwystąpień gra x gra z tabeli pośredniej User.library, porcjami po
+użytkownikach, i zapisuje top-K sąsiadów każdej gry w GameSimilarity.
+Endpointy czytają już tylko tę tabelę. NumPy/SciPy są importowane wyłącznie
+przez zadanie offline, nie przez procesy serwujące API.
+
+Pełne przeliczenie zapisuje też liczniki współwystąpień (GameCooccurrence).
+Między przebiegami zmiany bibliotek trafiają do dziennika LibraryChangeEvent,
+a ``manage.py update_recommendations`` (uruchamiane co kilka minut) nanosi
+same różnice na liczniki i przelicza top-K tylko gier, których pary się zmieniły.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import F, Max, Sum
+
+from .models import Game, GameCooccurrence, GameSimilarity, LibraryChangeEvent, User
+
+Library = User.library.through
+
+
+def library_rows(chunk_size, max_game_id=None):
+    """
+    Strumień porcji (user_ids, game_ids) z tabeli pośredniej, posortowany po użytkowniku.
+    Porcja nigdy nie rozcina biblioteki jednego użytkownika, więc żadna para nie ginie.
+    ``max_game_id`` pomija gry dodane po odczycie listy gier.
+    """
+    users, games = [], []
+    rows = Library.objects.order_by("user_id").values_list("user_id", "game_id")
+    if max_game_id is not None:
+        rows = rows.filter(game_id__lte=max_game_id)
+    for user_id, game_id in rows.iterator(chunk_size=chunk_size):
+        if len(users) >= chunk_size and user_id != users[-1]:
+            yield users, games
+            users, games = [], []
+        users.append(user_id)
+        games.append(game_id)
+    if users:
+        yield users, games
+
+
+def build_cooccurrence(game_ids, chunk_size):
+    """
+    Macierz współwystąpień C = X^T X (gra x gra), gdzie X to macierz użytkownik x gra
+    jednej porcji. Pamięć zależy od porcji i liczby niezerowych par, nie od liczby wierszy.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    n_games = len(game_ids)
+    cooccurrence = sparse.csr_matrix((n_games, n_games), dtype=np.float64)
+    if not n_games:
+        return cooccurrence
+    for users, games in library_rows(chunk_size, max_game_id=int(game_ids[-1])):
+        users, games = np.asarray(users), np.asarray(games)
+        # gra dodana do katalogu i biblioteki w trakcie przebiegu nie ma wiersza w macierzy –
+        # jej pary doliczy update_recommendations z dziennika LibraryChangeEvent
+        known = np.isin(games, game_ids)
+        if not known.all():
+            users, games = users[known], games[known]
+            if not len(users):
+                continue
+        _, user_index = np.unique(users, return_inverse=True)
+        game_index = np.searchsorted(game_ids, games)
+        ones = np.ones(len(users), dtype=np.float64)
+        owned = sparse.csr_matrix(
+            (ones, (user_index, game_index)),
+            shape=(user_index.max() + 1, n_games),
+        )
+        cooccurrence = cooccurrence + (owned.T @ owned).tocsr()
+    return cooccurrence
+
+
+def cosine_similarity(cooccurrence):
+    """Podobieństwo kosinusowe: C[i, j] / sqrt(n_i * n_j), bez przekątnej."""
+    import numpy as np
+    from scipy import sparse
+
+    owners = cooccurrence.diagonal()
+    norms = np.sqrt(owners)
+    norms[norms == 0] = 1.0
+    scale = sparse.diags(1.0 / norms)
+    similarity = (scale @ cooccurrence @ scale).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def top_k_neighbours(similarity, game_ids, top_k):
+    """Generator obiektów GameSimilarity: top-K sąsiadów każdego wiersza macierzy."""
+    import numpy as np
+
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        if start == end:
+            continue
+        scores = similarity.data[start:end]
+        columns = similarity.indices[start:end]
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            scores, columns = scores[best], columns[best]
+        # malejąco po wyniku, remisy po id gry – stabilna kolejność między przebiegami
+        order = np.lexsort((game_ids[columns], -scores))
+        for rank, i in enumerate(order, start=1):
+            yield GameSimilarity(
+                game_id=int(game_ids[row]),
+                similar_id=int(game_ids[columns[i]]),
+                score=float(scores[i]),
+                rank=rank,
+            )
+
+
+def cooccurrence_counts(cooccurrence, game_ids):
+    """Generator obiektów GameCooccurrence z niezerowych komórek macierzy (z przekątną)."""
+    matrix = cooccurrence.tocoo()
+    for row, column, count in zip(matrix.row, matrix.col, matrix.data):
+        yield GameCooccurrence(
+            game_id=int(game_ids[row]),
+            other_id=int(game_ids[column]),
+            count=int(count),
+        )
+
+
+def _bulk_create_batched(model, objects, batch_size):
+    written = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+    return written + len(batch)
+
+
+def rebuild_similarities(top_k=20, chunk_size=100_000, batch_size=5_000):
+    """
+    Pełne przeliczenie liczników współwystąpień i tabeli GameSimilarity.
+    Zdarzenia z dziennika zapisane przed odczytem bibliotek są już uwzględnione
+    i zostają usunięte. Zwraca liczbę zapisanych par podobnych gier.
+    """
+    import numpy as np
+
+    last_event = LibraryChangeEvent.objects.aggregate(last=Max("id"))["last"]
+    game_ids = np.fromiter(Game.objects.order_by("id").values_list("id", flat=True), dtype=np.int64)
+    cooccurrence = build_cooccurrence(game_ids, chunk_size)
+    similarity = cosine_similarity(cooccurrence)
+
+    with transaction.atomic():
+        GameCooccurrence.objects.all().delete()
+        _bulk_create_batched(GameCooccurrence, cooccurrence_counts(cooccurrence, game_ids), batch_size)
+        if last_event is not None:
+            LibraryChangeEvent.objects.filter(id__lte=last_event).delete()
+
+        GameSimilarity.objects.all().delete()
+        return _bulk_create_batched(GameSimilarity, top_k_neighbours(similarity, game_ids, top_k), batch_size)
+
+
+def record_library_changes(pairs, delta):
+    """Dopisuje do dziennika dodanie (1) lub usunięcie (-1) par (user_id, game_id) z bibliotek."""
+    LibraryChangeEvent.objects.bulk_create(
+        LibraryChangeEvent(user_id=user_id, game_id=game_id, delta=delta) for user_id, game_id in pairs
+    )
+
+
+def cooccurrence_deltas(owned, changes):
+    """
+    Zmiana liczników par wynikająca ze zmian biblioteki jednego użytkownika.
+
+    ``owned`` to obecna biblioteka, ``changes`` – suma zdarzeń per gra. Dla gier
+    niezmienionych K, dodanych A i usuniętych R zmiana to +K×A, +A×A, -K×R, -R×R
+    (obie kolejności pary, przekątna = liczba właścicieli).
+    """
+    added = {game_id for game_id, delta in changes.items() if delta > 0 and game_id in owned}
+    removed = {game_id for game_id, delta in changes.items() if delta < 0 and game_id not in owned}
+    kept = owned - added
+    deltas = Counter()
+    for changed, sign in ((added, 1), (removed, -1)):
+        for game_id in changed:
+            for other_id in kept:
+                deltas[game_id, other_id] += sign
+                deltas[other_id, game_id] += sign
+            for other_id in changed:
+                deltas[game_id, other_id] += sign
+    return deltas
+
+
+def apply_cooccurrence_deltas(deltas):
+    """Nanosi zmiany liczników jednym upsertem (count = count + delta) i usuwa wyzerowane pary."""
+    table = connection.ops.quote_name(GameCooccurrence._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"""
+            INSERT INTO {table} AS t (game_id, other_id, count)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (game_id, other_id) DO UPDATE SET count = t.count + EXCLUDED.count
+            """,
+            [(game_id, other_id, delta) for (game_id, other_id), delta in deltas.items() if delta],
+        )
+    affected = {game_id for game_id, _ in deltas}
+    GameCooccurrence.objects.filter(game_id__in=affected, count__lte=0).delete()
+    return affected
+
+
+def rerank_games(game_ids, top_k):
+    """Przelicza top-K sąsiadów podanych gier z zapisanych liczników współwystąpień."""
+    pairs = defaultdict(list)
+    owners = {}
+    rows = GameCooccurrence.objects.filter(game_id__in=game_ids).values_list("game_id", "other_id", "count")
+    for game_id, other_id, count in rows.iterator():
+        if game_id == other_id:
+            owners[game_id] = count
+        else:
+            pairs[game_id].append((other_id, count))
+
+    neighbours = {other_id for entries in pairs.values() for other_id, _ in entries} - owners.keys()
+    owners.update(
+        GameCooccurrence.objects.filter(game_id__in=neighbours, other_id=F("game_id"))
+        .values_list("game_id", "count")
+    )
+
+    entries = []
+    for game_id, candidates in pairs.items():
+        scored = (
+            (count / math.sqrt(owners[game_id] * owners[other_id]), other_id)
+            for other_id, count in candidates
+            if owners.get(game_id) and owners.get(other_id)
+        )
+        # malejąco po wyniku, remisy po id gry – jak w pełnym przeliczeniu
+        best = heapq.nsmallest(top_k, scored, key=lambda entry: (-entry[0], entry[1]))
+        entries.extend(
+            GameSimilarity(game_id=game_id, similar_id=other_id, score=score, rank=rank)
+            for rank, (score, other_id) in enumerate(best, start=1)
+        )
+
+    GameSimilarity.objects.filter(game_id__in=game_ids).delete()
+    GameSimilarity.objects.bulk_create(entries)
+
+
+def apply_library_changes(top_k=20, batch_size=10_000):
+    """
+    Jedna porcja przetwarzania dziennika: zdarzenia najstarszych użytkowników
+    (wszystkie zdarzenia każdego z nich naraz), zmiana liczników par i ponowny
+    ranking gier, których pary się zmieniły. Zwraca (zdarzenia, gry); (0, 0) gdy pusto.
+
+    Wynik sąsiada zależy też od liczby właścicieli tej drugiej gry, więc rankingi
+    gier bez zmienionych par mogą się nieznacznie zestarzeć – koryguje je okresowe
+    pełne przeliczenie.
+    """
+    with transaction.atomic():
+        oldest = LibraryChangeEvent.objects.order_by("id").values("user_id")[:batch_size]
+        events = list(
+            LibraryChangeEvent.objects.select_for_update()
+            .filter(user_id__in=oldest)
+            .values_list("id", "user_id", "game_id", "delta")
+        )
+        if not events:
+            return 0, 0
+
+        changes = defaultdict(Counter)
+        for _, user_id, game_id, delta in events:
+            changes[user_id][game_id] += delta
+        # zdarzenia mogą wskazywać gry usunięte od tamtej pory
+        existing = set(
+            Game.objects.filter(
+                pk__in={game_id for games in changes.values() for game_id in games}
+            ).values_list("pk", flat=True)
+        )
+        owned = defaultdict(set)
+        rows = Library.objects.filter(user_id__in=changes).values_list("user_id", "game_id")
+        for user_id, game_id in rows.iterator():
+            owned[user_id].add(game_id)
+
+        deltas = Counter()
+        for user_id, games in changes.items():
+            games = {game_id: delta for game_id, delta in games.items() if game_id in existing}
+            deltas.update(cooccurrence_deltas(owned[user_id], games))
+
+        affected = apply_cooccurrence_deltas(deltas) if deltas else set()
+        if affected:
+            rerank_games(affected, top_k)
+        LibraryChangeEvent.objects.filter(id__in=[event[0] for event in events]).delete()
+    return len(events), len(affected)
+
+
+def similar_games(queryset, game_id, limit):
+    """Sąsiedzi gry w kolejności rangi – odczyt po indeksie (game, rank)."""
+    return queryset.filter(
+        neighbour_entries__game_id=game_id,
+        neighbour_entries__rank__lte=limit,
+    ).order_by("neighbour_entries__rank")
+
+
+def recommended_games(queryset, user, limit):
+    """
+    Rekomendacje dla użytkownika: sąsiedzi gier z jego biblioteki, których jeszcze nie ma,
+    z wynikami zsumowanymi w bazie.
+    """
+    owned = Library.objects.filter(user_id=user.pk).values("game_id")
+    ranked = list(
+        GameSimilarity.objects.filter(game_id__in=owned)
+        .exclude(similar_id__in=owned)
+        .values("similar_id")
+        .annotate(total=Sum("score"))
+        .order_by("-total", "similar_id")
+        .values_list("similar_id", flat=True)[:limit]
+    )
+    games = {game.pk: game for game in queryset.filter(pk__in=ranked)}
+    return [games[pk] for pk in ranked if pk in games]
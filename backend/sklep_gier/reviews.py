@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+from django.db.models import Count, F, FloatField, Q, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from .models import Game, Review
+
+RATINGS = range(1, 6)
+HISTOGRAM_FIELDS = [f"rating_{rating}" for rating in RATINGS]
+RATING_FIELDS = ["rating_avg", "rating_count", *HISTOGRAM_FIELDS]
+
+
+def _average_expression(histogram, count):
+    """Średnia z histogramu: (1*r1 + ... + 5*r5) / liczba, 0 gdy brak recenzji."""
+    weighted = sum(rating * value for rating, value in zip(RATINGS, histogram))
+    return Coalesce(Cast(weighted, FloatField()) / NullIf(count, Value(0)), Value(0.0))
+
+
+def apply_rating(game_id, rating, delta):
+    """
+    Przyrostowa aktualizacja agregatów gry jednym UPDATE: ``delta`` = 1 przy dodaniu
+    recenzji, -1 przy usunięciu. Wywoływać w tej samej transakcji co zapis recenzji.
+    """
+    changed = f"rating_{rating}"
+    histogram = [F(field) + delta if field == changed else F(field) for field in HISTOGRAM_FIELDS]
+    count = F("rating_count") + delta
+    Game.objects.filter(pk=game_id).update(
+        rating_count=count,
+        rating_avg=_average_expression(histogram, count),
+        **{changed: F(changed) + delta},
+        # agregaty są częścią GameSerializer – klienci synchronizujący katalog muszą je odświeżyć
+        updated_at=timezone.now(),
+    )
+
+
+def review_aggregates(reviews):
+    """Liczba recenzji i histogram ocen per gra, policzone w bazie (GROUP BY game_id)."""
+    histogram = {
+        field: Count("id", filter=Q(rating=rating))
+        for rating, field in zip(RATINGS, HISTOGRAM_FIELDS)
+    }
+    return reviews.order_by().values("game_id").annotate(rating_count=Count("id"), **histogram)
+
+
+def game_with_ratings(row):
+    """Niezapisany obiekt Game z polami agregatów z wiersza ``review_aggregates`` (pod bulk_update)."""
+    histogram = [row[field] for field in HISTOGRAM_FIELDS]
+    count = row["rating_count"]
+    weighted = sum(rating * value for rating, value in zip(RATINGS, histogram))
+    average = (Decimal(weighted) / count).quantize(Decimal("0.01")) if count else Decimal("0")
+    return Game(
+        pk=row["game_id"],
+        rating_avg=average,
+        rating_count=count,
+        **dict(zip(HISTOGRAM_FIELDS, histogram)),
+    )
+
+
+def recompute_game_ratings(game_id):
+    """Pełne przeliczenie agregatów jednej gry (np. po edycji oceny istniejącej recenzji)."""
+    row = review_aggregates(Review.objects.filter(game_id=game_id)).first()
+    if row is None:
+        row = {"game_id": game_id, "rating_count": 0, **dict.fromkeys(HISTOGRAM_FIELDS, 0)}
+    game = game_with_ratings(row)
+    game.updated_at = timezone.now()
+    Game.objects.bulk_update([game], [*RATING_FIELDS, "updated_at"])
@@ -0,0 +1,101 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from .models import Game, Genre, Publisher
+
+# Słownik "simple" – tytuły i opisy są wielojęzyczne, więc bez stemmingu
+SEARCH_CONFIG = "simple"
+
+
+def is_postgres():
+    return connection.vendor == "postgresql"
+
+
+def search_vector_expression():
+    """
+    Wektor wyszukiwania gry: tytuł (A), wydawca i gatunki (B), opis (C).
+    Wydawca i gatunki są dociągane podzapytaniami, bo UPDATE nie pozwala na JOIN.
+    """
+    publisher_name = Subquery(
+        Publisher.objects.filter(pk=OuterRef("publisher_id")).values("name")[:1]
+    )
+    genre_names = Subquery(
+        Genre.objects.filter(game=OuterRef("pk"))
+        .values("game")
+        .annotate(names=StringAgg("name", delimiter=" "))
+        .values("names")
+    )
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(Coalesce(publisher_name, Value(""), output_field=TextField()), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(Coalesce(genre_names, Value(""), output_field=TextField()), weight="B", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(games):
+    """
+    Przelicza zapisany wektor wyszukiwania dla podanych gier (queryset lub lista id)
+    jednym UPDATE. Poza PostgreSQL nic nie robi – tam wyszukiwanie idzie ścieżką zastępczą.
+    """
+    if not is_postgres():
+        return
+    if not isinstance(games, QuerySet):
+        games = Game.objects.filter(pk__in=games)
+    games.update(search_vector=search_vector_expression())
+
+
+def search_games(queryset, text, limit):
+    """
+    Zwraca listę gier pasujących do ``text`` posortowaną wg trafności.
+    Gdy pełnotekstowe wyszukiwanie nic nie znajdzie, próbuje dopasowania trigramowego.
+    """
+    if not is_postgres():
+        return _search_games_fallback(queryset, text, limit)
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    results = list(
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "id")[:limit]
+    )
+    if results:
+        return results
+
+    # literówki: operator % korzysta z indeksu GIN gin_trgm_ops na tytule
+    return list(
+        queryset.filter(title__trigram_similar=text)
+        .annotate(similarity=TrigramSimilarity("title", text))
+        .order_by("-similarity", "id")[:limit]
+    )
+
+
+def _search_games_fallback(queryset, text, limit):
+    """Zastępcza ścieżka (np. SQLite w testach): proste dopasowanie podciągów."""
+    terms = text.split()
+    if not terms:
+        return []
+
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(title__icontains=term)
+            | Q(description__icontains=term)
+            | Q(publisher__name__icontains=term)
+            | Q(genres__name__icontains=term)
+        )
+    games = queryset.filter(condition).distinct().order_by("id")[: limit * 4]
+    # trafienia w tytule wyżej, tak jak waga A w wektorze
+    ranked = sorted(
+        games,
+        key=lambda g: -sum(term.lower() in g.title.lower() for term in terms),
+    )
+    return ranked[:limit]
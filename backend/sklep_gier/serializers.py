@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.exceptions import AuthenticationFailed
-from .models import Genre, Game, Publisher, User, Cart, CartItem
+from .authentication import ACTIVE_CLAIM, VERSION_CLAIM
+from .images import COVER_FORMATS
+from .models import Genre, Game, Publisher, User, Cart, CartItem, Order, OrderItem, Review
 
 class GenreSerializer(serializers.ModelSerializer):
     class Meta:
@@ -18,6 +20,8 @@ class GameSerializer(serializers.ModelSerializer):
     genres = GenreSerializer(many=True, read_only=True)
     publisher = PublisherSerializer(many=False, read_only=True)
     cover_image = serializers.SerializerMethodField()
+    cover_srcset = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
 
     class Meta:
         model = Game
@@ -30,19 +34,52 @@ class GameSerializer(serializers.ModelSerializer):
             "publisher",
             "genres",
             "cover_image",
+            "cover_srcset",
+            "rating_avg",
+            "rating_count",
+            "rating_histogram",
         )
     
+    def _absolute_url(self, url):
+        # adres bazowy liczony raz na serializer (przy many=True – raz na całą listę)
+        if not url.startswith("/"):
+            return url
+        if not hasattr(self, "_base_url"):
+            request = self.context.get("request")
+            self._base_url = request.build_absolute_uri("/")[:-1] if request else ""
+        return self._base_url + url
+
     def get_cover_image(self, obj):
         if not obj.cover_image:
             return None
-        request = self.context.get("request")
-        url = obj.cover_image.url
-        return request.build_absolute_uri(url) if request else url
+        # adres zapisany razem z wariantami – bez wywołania storage przy każdym obiekcie
+        url = obj.cover_variants.get("original") or obj.cover_image.url
+        return self._absolute_url(url)
+
+    def get_cover_srcset(self, obj):
+        """Gotowe atrybuty srcset per format (webp, jpeg) albo None, gdy brak wariantów."""
+        srcset = {
+            key: ", ".join(f"{self._absolute_url(url)} {width}w" for width, url in variants)
+            for key, variants in obj.cover_variants.items()
+            if key in COVER_FORMATS
+        }
+        return srcset or None
+
+    def get_rating_histogram(self, obj):
+        return {str(rating): getattr(obj, f"rating_{rating}") for rating in range(1, 6)}
 
 
 class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
     username_field = "email"
 
+    @classmethod
+    def get_token(cls, user):
+        # claimy dla ClaimsJWTAuthentication – przechodzą też do tokenów z /token/refresh/
+        token = super().get_token(user)
+        token[ACTIVE_CLAIM] = user.is_active
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
     def validate(self, attrs):
         email = attrs.get("email")
         password = attrs.get("password")
@@ -79,7 +116,11 @@ class CartItemSerializer(serializers.ModelSerializer):
         fields = ("id", "game", "game_id", "quantity", "subtotal")
 
     def get_subtotal(self, obj):
-        return obj.quantity * obj.game.price
+        # subtotal z adnotacji CartItem.objects.with_subtotals(), gdy jest dostępny
+        subtotal = getattr(obj, "subtotal", None)
+        if subtotal is None:
+            subtotal = obj.quantity * obj.game.price
+        return subtotal
 
 
 class CartSerializer(serializers.ModelSerializer):
@@ -92,7 +133,54 @@ class CartSerializer(serializers.ModelSerializer):
         read_only_fields = ("user",)
 
     def get_total_price(self, obj):
-        total = 0
-        for item in obj.cartitem_set.all():
-            total += item.quantity * item.game.price
+        # total_price z adnotacji Cart.objects.with_total_price(), gdy jest dostępny
+        total = getattr(obj, "total_price", None)
+        if total is None:
+            total = Cart.objects.with_total_price().values_list("total_price", flat=True).get(pk=obj.pk)
         return total
+
+
+class CartBatchOperationSerializer(serializers.Serializer):
+    """Pojedyncza operacja zbiorczej zmiany koszyka (po game_id)."""
+
+    op = serializers.ChoiceField(choices=("add", "set", "remove"))
+    game_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0, max_value=CartItem.MAX_QUANTITY, required=False)
+
+    def validate(self, attrs):
+        if attrs["op"] == "add":
+            attrs.setdefault("quantity", 1)
+            if attrs["quantity"] <= 0:
+                raise serializers.ValidationError({"quantity": "must be positive for add"})
+        elif attrs["op"] == "set" and "quantity" not in attrs:
+            raise serializers.ValidationError({"quantity": "required for set"})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartBatchOperationSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    title = serializers.CharField(source="game.title", read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ("id", "game", "title", "price_snapshot")
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, source="orderitem_set", read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ("id", "status", "total_price", "created_at", "items")
+
+
+class ReviewSerializer(serializers.ModelSerializer):
+    nickname = serializers.CharField(source="user.username", read_only=True)
+
+    class Meta:
+        model = Review
+        fields = ("id", "nickname", "rating", "comment", "created_at")
+        read_only_fields = ("created_at",)
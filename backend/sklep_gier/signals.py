@@ -0,0 +1,157 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump_catalog_generation, bump_user_version_on_commit, invalidate_auth_state_on_commit
+from .images import cover_variants_stale, update_cover_variants
+from .models import Game, Genre, Publisher, Review, User
+from .recommendations import record_library_changes
+from .reviews import apply_rating, recompute_game_ratings
+from .search import update_search_vectors
+from .sync import record_tombstone, touch_games
+
+
+# Wektor wyszukiwania gry zależy od jej tytułu, opisu, wydawcy i gatunków
+@receiver(post_save, sender=Game)
+def game_saved(sender, instance, **kwargs):
+    update_search_vectors([instance.pk])
+
+
+# Warianty okładki liczone przy wgraniu nowego pliku (albo usunięciu okładki)
+@receiver(post_save, sender=Game)
+def game_cover_saved(sender, instance, raw=False, **kwargs):
+    if not raw and cover_variants_stale(instance):
+        update_cover_variants(instance)
+
+
+@receiver(m2m_changed, sender=Game.genres.through)
+def game_genres_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        update_search_vectors([instance.pk])
+    elif pk_set:
+        update_search_vectors(pk_set)
+
+
+@receiver(post_save, sender=Publisher)
+def publisher_saved(sender, instance, created, **kwargs):
+    if not created:
+        update_search_vectors(Game.objects.filter(publisher=instance))
+
+
+@receiver(post_save, sender=Genre)
+def genre_saved(sender, instance, created, **kwargs):
+    if not created:
+        update_search_vectors(Game.objects.filter(genres=instance))
+
+
+# Znaczniki zmian dla /api/sync/catalog/: auto_now obejmuje zapis samego obiektu,
+# tu dochodzi to, co zmienia dane gry pośrednio (gatunki, nazwy wydawcy i gatunków)
+@receiver(m2m_changed, sender=Game.genres.through)
+def game_genres_touched(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            touch_games([instance.pk])
+    elif action == "pre_clear":
+        # genre.game_set.clear() nie przekazuje pk_set
+        touch_games(instance.game_set.all())
+    elif action in ("post_add", "post_remove"):
+        touch_games(pk_set)
+
+
+@receiver(post_save, sender=Publisher)
+def publisher_touched(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        touch_games(Game.objects.filter(publisher=instance))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_touched(sender, instance, created=False, raw=False, **kwargs):
+    # przy usuwaniu gatunku wiersze powiązań znikają kaskadowo, bez m2m_changed
+    if not created and not raw:
+        touch_games(Game.objects.filter(genres=instance))
+
+
+@receiver(post_delete, sender=Game)
+@receiver(post_delete, sender=Publisher)
+@receiver(post_delete, sender=Genre)
+def catalog_object_deleted(sender, instance, **kwargs):
+    record_tombstone(instance)
+
+
+# Każda zmiana danych katalogu unieważnia zbuforowane odpowiedzi (cache.py).
+# Podbicie generacji dopiero po commicie, żeby nikt nie zapisał starych danych pod nową generacją.
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+@receiver(post_save, sender=Publisher)
+@receiver(post_delete, sender=Publisher)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(m2m_changed, sender=Game.genres.through)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def catalog_changed(sender, action=None, **kwargs):
+    # m2m_changed przychodzi też w wariantach pre_*
+    if action is None or action.startswith("post_"):
+        transaction.on_commit(bump_catalog_generation)
+
+
+# Wersja biblioteki użytkownika (ETag w library). Wersję koszyka (Cart.version) podbijają
+# widoki koszyka i checkout raz na żądanie, pod blokadą koszyka – bez sygnałów per pozycja.
+def _bump_user_versions(kind, user_ids):
+    for user_id in user_ids:
+        bump_user_version_on_commit(kind, user_id)
+
+
+@receiver(m2m_changed, sender=User.library.through)
+def library_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            _bump_user_versions("library", [instance.pk])
+    elif action == "pre_clear":
+        # game.owned_by.clear() nie przekazuje pk_set – zbieramy właścicieli przed usunięciem
+        _bump_user_versions("library", instance.owned_by.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        _bump_user_versions("library", pk_set)
+
+
+# Dziennik zmian bibliotek dla przyrostowych rekomendacji (recommendations.py).
+# Usunięcia zapisujemy w pre_*, żeby zalogować tylko gry faktycznie posiadane;
+# post_add dostaje w pk_set wyłącznie nowo dodane wiersze.
+@receiver(m2m_changed, sender=User.library.through)
+def library_change_events(sender, instance, action, reverse, pk_set, **kwargs):
+    owner, target = ("game_id", "user_id") if reverse else ("user_id", "game_id")
+    if action == "post_add":
+        delta, targets = 1, pk_set
+    elif action in ("pre_remove", "pre_clear"):
+        rows = sender.objects.filter(**{owner: instance.pk})
+        if action == "pre_remove":
+            rows = rows.filter(**{f"{target}__in": pk_set})
+        delta, targets = -1, rows.values_list(target, flat=True)
+    else:
+        return
+    pairs = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in targets]
+    record_library_changes(pairs, delta)
+
+
+# Zmiana konta (np. dezaktywacja) – ClaimsJWTAuthentication musi od razu zobaczyć nowy stan
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_auth_state_on_commit(instance.pk)
+
+
+# Agregaty ocen na Game – w tej samej transakcji co zapis recenzji
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        apply_rating(instance.game_id, instance.rating, 1)
+    else:
+        recompute_game_ratings(instance.game_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    apply_rating(instance.game_id, instance.rating, -1)
@@ -0,0 +1,88 @@
+"""
+Śledzenie zmian katalogu dla klientów trzymających jego lokalną kopię (frontend,
+aplikacje mobilne, eksport przyrostowy).
+
+Game, Publisher i Genre mają ``updated_at`` (auto_now); zmiany, których auto_now nie
+widzi (gatunki gry, nazwa wydawcy w danych gry, agregaty ocen), podbijają go przez
+``touch_games``. Usunięcia zostawiają CatalogTombstone.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import CatalogTombstone, Game, Genre, Publisher
+
+# klucz odpowiedzi -> (rodzaj w CatalogTombstone, model)
+SYNC_MODELS = {
+    "games": ("game", Game),
+    "publishers": ("publisher", Publisher),
+    "genres": ("genre", Genre),
+}
+TOMBSTONE_KINDS = {model: kind for kind, model in SYNC_MODELS.values()}
+
+
+def parse_timestamp(value):
+    """Znacznik czasu ISO 8601 z parametru zapytania (samo datum = północ). None przy błędzie."""
+    try:
+        moment = parse_datetime(value)
+        day = parse_date(value) if moment is None else None
+    except ValueError:
+        return None
+    if moment is None:
+        if day is None:
+            return None
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def sync_cursor():
+    """
+    Znacznik do przekazania w następnym ``since``. Cofnięty o SYNC_OVERLAP_SECONDS, bo
+    updated_at jest ustawiany przed commitem – wolniejsza transakcja mogłaby zapisać
+    starszy znacznik już po odczycie. Kosztem są pojedyncze powtórzone id.
+    """
+    return timezone.now() - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+
+
+def tombstone_horizon():
+    """Najstarsza chwila, od której tombstone'y są jeszcze kompletne (prune_tombstones)."""
+    return timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def touch_games(games):
+    """Podbija updated_at gier (queryset lub lista id) jednym UPDATE."""
+    if not isinstance(games, QuerySet):
+        games = Game.objects.filter(pk__in=games)
+    games.update(updated_at=timezone.now())
+
+
+def record_tombstone(instance):
+    CatalogTombstone.objects.create(kind=TOMBSTONE_KINDS[type(instance)], object_id=instance.pk)
+
+
+def catalog_changes(since=None):
+    """
+    (full, zmiany) – dla każdego modelu id zmienione (``changed``) i usunięte (``deleted``)
+    po ``since``. Bez ``since`` albo gdy jest starszy niż przechowywane tombstone'y,
+    ``full`` = True: ``changed`` zawiera wszystkie id, a klient odrzuca resztę kopii.
+    """
+    full = since is None or since < tombstone_horizon()
+    changes = {}
+    for key, (kind, model) in SYNC_MODELS.items():
+        changed = model.objects.order_by("pk")
+        deleted = []
+        if not full:
+            changed = changed.filter(updated_at__gt=since)
+            deleted = list(
+                CatalogTombstone.objects.filter(kind=kind, deleted_at__gt=since)
+                .order_by("object_id")
+                .values_list("object_id", flat=True)
+                .distinct()
+            )
+        changes[key] = {"changed": list(changed.values_list("pk", flat=True)), "deleted": deleted}
+    return full, changes
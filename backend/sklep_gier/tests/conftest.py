@@ -0,0 +1,61 @@
+import itertools
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from sklep_gier.models import Game, Genre, Publisher, User
+
+_seq = itertools.count()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def publisher(db):
+    return Publisher.objects.create(name="CD Projekt", website="https://cdprojekt.com")
+
+
+@pytest.fixture
+def genre(db):
+    return Genre.objects.create(name="RPG")
+
+
+@pytest.fixture
+def make_game(publisher):
+    def make(**kwargs):
+        n = next(_seq)
+        kwargs.setdefault("title", f"Game {n}")
+        kwargs.setdefault("description", "")
+        kwargs.setdefault("price", Decimal("49.99"))
+        kwargs.setdefault("release_date", date(2020, 1, 1))
+        kwargs.setdefault("publisher", publisher)
+        genres = kwargs.pop("genres", [])
+        game = Game.objects.create(**kwargs)
+        if genres:
+            game.genres.set(genres)
+        return game
+    return make
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        username="gracz", email="gracz@example.com", password="Haslo123!"
+    )
+
+
+@pytest.fixture
+def auth_client(api_client, user):
+    api_client.force_authenticate(user=user)
+    return api_client
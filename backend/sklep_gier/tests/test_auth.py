@@ -0,0 +1,122 @@
+import json
+from datetime import date
+from io import StringIO
+
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from sklep_gier.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def test_jwt_claims_authenticate_without_user_query(api_client, user, django_capture_on_commit_callbacks):
+    tokens = api_client.post("/api/token/", {"email": "gracz@example.com", "password": "Haslo123!"}).json()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+    assert api_client.get("/api/cart/").status_code == 200
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert api_client.get("/api/cart/").status_code == 200
+    assert not any("sklep_gier_user" in query["sql"] for query in ctx.captured_queries)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.revoke_tokens()
+    response = api_client.get("/api/cart/")
+    assert response.status_code == 401
+    assert response.json()["code"] == "token_revoked"
+
+
+def test_login_rehashes_legacy_password(api_client, user):
+    user.password = make_password("Haslo123!", hasher="pbkdf2_sha256")
+    user.save(update_fields=["password"])
+
+    response = api_client.post("/api/token/", {"email": "GRACZ@example.com", "password": "Haslo123!"})
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert user.password.startswith("argon2$")
+
+
+def test_login_throttled_per_email_before_hashing(api_client, user, settings, monkeypatch):
+    settings.LOGIN_THROTTLE_RATES = {"ip": (100, 1), "email": (2, 0.001)}
+    checked = []
+    original = User.check_password
+    monkeypatch.setattr(User, "check_password", lambda self, raw: checked.append(raw) or original(self, raw))
+
+    for _ in range(2):
+        assert api_client.post("/api/token/", {"email": "gracz@example.com", "password": "zle"}).status_code == 401
+    response = api_client.post("/api/token/", {"email": "Gracz@example.com", "password": "Haslo123!"})
+    assert response.status_code == 429
+    assert int(response["Retry-After"]) > 0
+    assert len(checked) == 2
+
+
+def test_login_ip_bucket_ignores_spoofed_forwarded_for(api_client, user, settings):
+    settings.LOGIN_THROTTLE_RATES = {"ip": (2, 0.001), "email": (100, 1)}
+
+    statuses = [
+        api_client.post(
+            "/api/token/",
+            {"email": f"gracz{attempt}@example.com", "password": "zle"},
+            HTTP_X_FORWARDED_FOR=f"203.0.113.{attempt}",
+        ).status_code
+        for attempt in range(4)
+    ]
+    assert statuses == [401, 401, 429, 429]
+
+
+def test_register_conflicts_from_constraints(api_client, user, django_assert_max_num_queries):
+    payload = {"email": "nowy@example.com", "password": "Haslo123!", "nickname": "nowy",
+               "first_name": "", "last_name": ""}
+    with django_assert_max_num_queries(3):
+        assert api_client.post("/api/register/", payload).status_code == 201
+
+    duplicate_email = {**payload, "email": "GRACZ@example.com", "nickname": "inny"}
+    response = api_client.post("/api/register/", duplicate_email)
+    assert (response.status_code, response.json()) == (400, {"detail": "email already registered"})
+
+    duplicate_nickname = {**payload, "email": "inny@example.com", "nickname": "gracz"}
+    response = api_client.post("/api/register/", duplicate_nickname)
+    assert (response.status_code, response.json()) == (400, {"detail": "nickname already taken"})
+
+
+def test_import_users_command(user, tmp_path):
+    legacy = make_password("Stare123!", hasher="pbkdf2_sha256")
+    source = tmp_path / "users.csv"
+    source.write_text(
+        "email,password,password_hash,nickname,birth_date\n"
+        "anna@example.com,Haslo123!,,anna,1990-05-01\n"
+        "ANNA@example.com,Haslo123!,,anna2,\n"
+        "gracz@EXAMPLE.com,Haslo123!,,nowy,\n"
+        f"jan@example.com,,{legacy},jan,\n"
+        "zly@example.com,Haslo123!,,zly,nie-data\n"
+        "to-nie-email,Haslo123!,,bez_maila,\n"
+    )
+
+    out, err = StringIO(), StringIO()
+    call_command("import_users", str(source), workers=1, batch_size=2, stdout=out, stderr=err)
+    assert "Zaimportowano 2 z 6 użytkowników (2 już istniało, 2 błędnych)" in out.getvalue()
+    assert "Wiersz 5: błędna data urodzenia" in err.getvalue()
+    assert "Wiersz 6: błędny e-mail" in err.getvalue()
+
+    anna = User.objects.get(username="anna")
+    assert anna.check_password("Haslo123!") and anna.birth_date == date(1990, 5, 1)
+    assert User.objects.get(username="jan").check_password("Stare123!")
+    assert not User.objects.filter(username__in=["anna2", "nowy", "zly", "bez_maila"]).exists()
+
+
+def test_import_users_counts_only_inserted_rows(user, tmp_path, monkeypatch):
+    # konto zarejestrowane między sprawdzeniem istnienia a bulk_create – ignore_conflicts je pomija
+    monkeypatch.setattr(
+        "sklep_gier.management.commands.import_users.Command.exclude_existing", lambda self, users: users
+    )
+    source = tmp_path / "users.jsonl"
+    source.write_text(
+        json.dumps({"email": "gracz@example.com", "password": "Haslo123!", "nickname": "inny"}) + "\n"
+        + json.dumps({"email": "nowa@example.com", "password": "Haslo123!", "nickname": "nowa"}) + "\n"
+    )
+    out = StringIO()
+    call_command("import_users", str(source), workers=1, stdout=out)
+    assert "Zaimportowano 1 z 2 użytkowników (1 już istniało" in out.getvalue()
@@ -0,0 +1,1012 @@
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+import numpy as np
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from sklep_gier.models import (
+    Cart,
+    CartItem,
+    Game,
+    GameCooccurrence,
+    GameSimilarity,
+    Genre,
+    LibraryChangeEvent,
+    Order,
+    OrderItem,
+    Publisher,
+    Review,
+    User,
+)
+from sklep_gier.checkout import checkout_cart
+from sklep_gier.db_router import ReadReplicaRouter, use_replica
+from sklep_gier.recommendations import build_cooccurrence, rebuild_similarities
+
+pytestmark = pytest.mark.django_db
+
+
+def _collect_pages(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        ids += [g["id"] for g in data["results"]]
+        url = data["next"]
+    return ids
+
+
+def test_game_list_without_cursor_returns_plain_list(api_client, make_game):
+    make_game()
+    response = api_client.get("/api/games/")
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+
+def test_game_list_keyset_by_release_date(api_client, make_game):
+    games = [make_game(release_date=date(2020, 1, 1 + i % 3)) for i in range(7)]
+    expected = [g.id for g in sorted(games, key=lambda g: (g.release_date, g.id), reverse=True)]
+
+    ids = _collect_pages(api_client, "/api/games/?page_size=2")
+    assert ids == expected
+
+
+def test_game_list_keyset_by_price(api_client, make_game):
+    games = [make_game(price=Decimal("10.00") + i % 2) for i in range(5)]
+    expected = [g.id for g in sorted(games, key=lambda g: (g.price, g.id))]
+
+    ids = _collect_pages(api_client, "/api/games/?ordering=price&page_size=2")
+    assert ids == expected
+
+
+def test_keyset_cursor_bounds_index_range(api_client, make_game):
+    for day in (1, 2, 3):
+        make_game(release_date=date(2020, 1, day))
+    url = api_client.get("/api/games/?page_size=1").json()["next"]
+    with CaptureQueriesContext(connection) as ctx:
+        api_client.get(url)
+    sql = next(q["sql"] for q in ctx.captured_queries if "ORDER BY" in q["sql"])
+    where = sql.split("WHERE", 1)[1]
+    # granica zakresu indeksu (release_date, id) musi stać poza alternatywą
+    assert '"release_date" <= ' in where.split(" OR ")[0]
+    assert " AND (" in where
+
+
+def test_game_list_page_size_is_bounded(api_client, make_game):
+    for _ in range(3):
+        make_game()
+    response = api_client.get("/api/games/?page_size=100000")
+    assert len(response.json()["results"]) == 3
+    assert response.json()["next"] is None
+
+
+def test_game_list_invalid_cursor(api_client, make_game):
+    response = api_client.get("/api/games/?cursor=nie-kursor")
+    assert response.status_code == 404
+
+
+# Budżety zapytań: liczba zapytań SQL na endpoint nie może rosnąć z liczbą gier.
+QUERY_BUDGETS = {
+    "/api/games/": 2,
+    "/api/games/?page_size=50": 4,  # + 2 zapytania na liczniki facet
+    "/api/library/": 2,
+    "/api/cart/": 3,
+}
+
+
+@pytest.fixture
+def populate(user, make_game, genre):
+    cart = Cart.objects.create(user=user)
+
+    def populate(count):
+        for _ in range(count):
+            game = make_game(genres=[genre])
+            user.library.add(game)
+            CartItem.objects.create(cart=cart, game=game, quantity=2)
+    return populate
+
+
+@pytest.mark.parametrize("url", QUERY_BUDGETS)
+def test_query_budget(auth_client, populate, url, settings):
+    # budżet dotyczy ścieżki bez cache odpowiedzi
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    counts = []
+    for batch in (1, 20):
+        populate(batch)
+        with CaptureQueriesContext(connection) as ctx:
+            response = auth_client.get(url)
+        assert response.status_code == 200
+        counts.append(len(ctx.captured_queries))
+
+    assert counts[0] == counts[1], f"{url}: N+1 ({counts[0]} -> {counts[1]} zapytań)"
+    assert counts[1] <= QUERY_BUDGETS[url], f"{url}: {counts[1]} zapytań, budżet {QUERY_BUDGETS[url]}"
+
+
+def test_game_detail_query_budget(api_client, make_game, genre, django_assert_max_num_queries):
+    game = make_game(genres=[genre])
+    with django_assert_max_num_queries(2):
+        response = api_client.get(f"/api/games/{game.id}/")
+    assert response.status_code == 200
+    assert response.json()["publisher"]["name"] == game.publisher.name
+
+
+def test_game_search_ranks_title_matches_first(api_client, make_game, genre):
+    in_description = make_game(title="Gothic", description="Klasyczny wiedźmin w tle")
+    in_title = make_game(title="Wiedźmin 3", genres=[genre])
+    make_game(title="Tetris")
+
+    response = api_client.get("/api/games/search/", {"q": "wiedźmin"})
+    assert response.status_code == 200
+    assert [g["id"] for g in response.json()] == [in_title.id, in_description.id]
+
+
+def test_game_search_matches_publisher_and_genre(api_client, make_game, genre):
+    game = make_game(title="Cyberpunk 2077", genres=[genre])
+    assert [g["id"] for g in api_client.get("/api/games/search/", {"q": "projekt"}).json()] == [game.id]
+    assert [g["id"] for g in api_client.get("/api/games/search/", {"q": "rpg"}).json()] == [game.id]
+
+
+def test_game_search_requires_query(api_client):
+    assert api_client.get("/api/games/search/").status_code == 400
+
+
+@pytest.fixture
+def faceted_catalog(make_game, publisher, genre):
+    indie = Publisher.objects.create(name="Indie Studio")
+    strategy = Genre.objects.create(name="Strategy")
+    return {
+        "witcher": make_game(price=Decimal("99.00"), release_date=date(2015, 5, 19), genres=[genre]),
+        "civ": make_game(price=Decimal("59.00"), release_date=date(2016, 10, 21), genres=[strategy]),
+        "hybrid": make_game(
+            price=Decimal("19.00"), release_date=date(2021, 1, 1), publisher=indie, genres=[genre, strategy]
+        ),
+        "genres": (genre, strategy),
+        "indie": indie,
+    }
+
+
+def _ids(response):
+    return {g["id"] for g in response.json()["results"]}
+
+
+def test_game_filter_by_genres_any_and_all(api_client, faceted_catalog):
+    rpg, strategy = faceted_catalog["genres"]
+    any_ = api_client.get("/api/games/", {"page_size": 10, "genre": f"{rpg.id},{strategy.id}"})
+    all_ = api_client.get("/api/games/", {"page_size": 10, "genre": f"{rpg.id},{strategy.id}", "genre_mode": "all"})
+
+    assert _ids(any_) == {faceted_catalog[k].id for k in ("witcher", "civ", "hybrid")}
+    assert _ids(all_) == {faceted_catalog["hybrid"].id}
+
+
+def test_game_filter_by_publisher_price_and_release(api_client, faceted_catalog):
+    response = api_client.get("/api/games/", {
+        "page_size": 10,
+        "price_min": "20",
+        "price_max": "80",
+        "released_after": "2016-01-01",
+    })
+    assert _ids(response) == {faceted_catalog["civ"].id}
+
+    response = api_client.get("/api/games/", {"page_size": 10, "publisher": faceted_catalog["indie"].id})
+    assert _ids(response) == {faceted_catalog["hybrid"].id}
+
+
+def test_game_list_facet_counts(api_client, faceted_catalog):
+    rpg, strategy = faceted_catalog["genres"]
+    response = api_client.get("/api/games/", {"page_size": 1, "price_max": "60"})
+
+    facets = response.json()["facets"]
+    assert {f["id"]: f["count"] for f in facets["genres"]} == {rpg.id: 1, strategy.id: 2}
+    assert {f["name"]: f["count"] for f in facets["publishers"]} == {"CD Projekt": 1, "Indie Studio": 1}
+
+    # kolejne strony nie powtarzają zapytań GROUP BY po całym filtrze
+    next_page = api_client.get(response.json()["next"])
+    assert next_page.status_code == 200 and "facets" not in next_page.json()
+
+
+def test_game_filter_rejects_invalid_params(api_client):
+    assert api_client.get("/api/games/", {"price_min": "tanio"}).status_code == 400
+
+
+def test_catalog_response_is_cached_until_catalog_changes(
+    api_client, make_game, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    game = make_game()
+    first = api_client.get(f"/api/games/{game.id}/")
+    with django_assert_num_queries(0):
+        cached = api_client.get(f"/api/games/{game.id}/")
+    assert cached.content == first.content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        game.title = "Nowy tytuł"
+        game.save()
+    assert api_client.get(f"/api/games/{game.id}/").json()["title"] == "Nowy tytuł"
+
+
+def test_publishers_invalidated_by_publisher_delete(api_client, publisher, django_capture_on_commit_callbacks):
+    assert len(api_client.get("/api/publishers/").json()) == 1
+    with django_capture_on_commit_callbacks(execute=True):
+        publisher.delete()
+    assert api_client.get("/api/publishers/").json() == []
+
+
+def test_catalog_conditional_get(api_client, make_game):
+    make_game()
+    response = api_client.get("/api/games/")
+    assert response.status_code == 200
+
+    not_modified = api_client.get("/api/games/", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert not_modified.status_code == 304
+    not_modified = api_client.get("/api/games/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert not_modified.status_code == 304
+
+
+def test_cart_conditional_get(auth_client, user, make_game, django_assert_max_num_queries):
+    first = auth_client.get("/api/cart/")
+    etag = first["ETag"]
+    # wersja koszyka jest w bazie – 304 to jedno zapytanie po indeksie, bez pozycji
+    with django_assert_max_num_queries(1):
+        assert auth_client.get("/api/cart/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    auth_client.post("/api/cart/add/", {"game_id": make_game().id})
+    changed = auth_client.get("/api/cart/", HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+    assert changed["ETag"] != etag
+
+
+def test_library_conditional_get(auth_client, user, make_game, django_capture_on_commit_callbacks):
+    etag = auth_client.get("/api/library/")["ETag"]
+    assert auth_client.get("/api/library/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    game = make_game()
+    with django_capture_on_commit_callbacks(execute=True):
+        game.owned_by.add(user)
+    assert auth_client.get("/api/library/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_cart_and_library_etags_follow_catalog_changes(
+    api_client, user, make_game, django_capture_on_commit_callbacks
+):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    game = make_game(price=Decimal("10.00"))
+    api_client.post("/api/cart/add/", {"game_id": game.id})
+    user.library.add(game)
+    cart_etag = api_client.get("/api/cart/")["ETag"]
+    library_etag = api_client.get("/api/library/")["ETag"]
+
+    game.price = Decimal("99.00")
+    game.title = "Nowy tytuł"
+    with django_capture_on_commit_callbacks(execute=True):
+        game.save()
+
+    cart = api_client.get("/api/cart/", HTTP_IF_NONE_MATCH=cart_etag)
+    assert (cart.status_code, Decimal(str(cart.json()["total_price"]))) == (200, Decimal("99.00"))
+    assert api_client.get("/api/library/", HTTP_IF_NONE_MATCH=library_etag).status_code == 200
+    assert api_client.get("/api/async/library/", HTTP_IF_NONE_MATCH=library_etag).status_code == 200
+    # zmiana katalogu nie jest konfliktem zapisu koszyka
+    assert api_client.post("/api/cart/add/", {"game_id": game.id}, HTTP_IF_MATCH=cart_etag).status_code == 201
+
+
+def test_cart_mutation_if_match(auth_client, make_game):
+    game = make_game()
+    etag = auth_client.get("/api/cart/")["ETag"]
+
+    added = auth_client.post("/api/cart/add/", {"game_id": game.id}, HTTP_IF_MATCH=etag)
+    assert added.status_code == 201
+
+    # ETag sprzed dodania jest już nieaktualny
+    stale = auth_client.patch(
+        f"/api/cart/update/{added.json()['id']}/", {"quantity": 3}, HTTP_IF_MATCH=etag
+    )
+    assert stale.status_code == 412
+
+    fresh = auth_client.patch(
+        f"/api/cart/update/{added.json()['id']}/", {"quantity": 3},
+        HTTP_IF_MATCH=auth_client.get("/api/cart/")["ETag"],
+    )
+    assert fresh.status_code == 200
+
+
+def test_cart_update_item_validates_quantity(auth_client, make_game):
+    item_id = auth_client.post("/api/cart/add/", {"game_id": make_game().id}).json()["id"]
+    for quantity in ("abc", "1.5", CartItem.MAX_QUANTITY + 1):
+        response = auth_client.patch(f"/api/cart/update/{item_id}/", {"quantity": quantity})
+        assert response.status_code == 400, quantity
+    assert auth_client.patch(f"/api/cart/update/{item_id}/", {"quantity": "4"}).json()["quantity"] == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cart_if_match_is_compare_and_set(user, make_game):
+    # równoległe zmiany z tym samym ETagiem – przechodzi dokładnie jedna
+    game = make_game()
+    client = APIClient()
+    client.force_authenticate(user=user)
+    etag = client.get("/api/cart/")["ETag"]
+
+    def add(_):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            return client.post("/api/cart/add/", {"game_id": game.id}, HTTP_IF_MATCH=etag).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        statuses = sorted(pool.map(add, range(4)))
+
+    assert statuses == [201, 412, 412, 412]
+    assert CartItem.objects.get(cart__user=user).quantity == 1
+
+
+def test_cart_writes_query_count_independent_of_items(auth_client, user, make_game):
+    cart = Cart.objects.create(user=user)
+    counts = {}
+    for size in (1, 20):
+        games = [make_game() for _ in range(size)]
+        operations = [{"op": "remove", "game_id": game.id} for game in games]
+        CartItem.objects.bulk_create(CartItem(cart=cart, game=game) for game in games)
+        with CaptureQueriesContext(connection) as remove:
+            assert auth_client.post("/api/cart/batch/", {"operations": operations}, format="json").status_code == 200
+        CartItem.objects.bulk_create(CartItem(cart=cart, game=game) for game in games)
+        with CaptureQueriesContext(connection) as checkout:
+            assert auth_client.post("/api/checkout/").status_code == 201
+        counts[size] = (len(remove.captured_queries), len(checkout.captured_queries))
+    assert counts[1] == counts[20], counts
+
+
+def test_cart_totals_computed_in_database(auth_client, user, make_game):
+    cart = Cart.objects.create(user=user)
+    CartItem.objects.create(cart=cart, game=make_game(price=Decimal("19.99")), quantity=3)
+    CartItem.objects.create(cart=cart, game=make_game(price=Decimal("0.10")), quantity=2)
+
+    data = auth_client.get("/api/cart/").json()
+    assert sorted(Decimal(str(i["subtotal"])) for i in data["items"]) == [Decimal("0.20"), Decimal("59.97")]
+    assert Decimal(str(data["total_price"])) == Decimal("60.17")
+
+
+def test_empty_cart_total(auth_client):
+    assert auth_client.get("/api/cart/").json()["total_price"] == 0
+
+
+def test_cart_add_item_increments_existing_row(auth_client, user, make_game):
+    game = make_game()
+    first = auth_client.post("/api/cart/add/", {"game_id": game.id, "quantity": 2})
+    second = auth_client.post("/api/cart/add/", {"game_id": game.id, "quantity": 3})
+
+    assert first.json()["id"] == second.json()["id"]
+    assert second.json()["quantity"] == 5
+    assert CartItem.objects.filter(cart__user=user).count() == 1
+
+
+def test_cart_add_item_unknown_game(auth_client):
+    assert auth_client.post("/api/cart/add/", {"game_id": 999999}).status_code == 404
+    assert auth_client.post("/api/cart/add/", {"game_id": "abc"}).status_code == 400
+
+
+def test_cart_add_item_quantity_capped(auth_client, user, make_game):
+    game = make_game()
+    limit = CartItem.MAX_QUANTITY
+    assert auth_client.post("/api/cart/add/", {"game_id": game.id, "quantity": limit + 1}).status_code == 400
+    assert auth_client.post("/api/cart/add/", {"game_id": game.id, "quantity": 2**40}).status_code == 400
+    assert auth_client.post("/api/cart/add/", {"game_id": game.id, "quantity": limit - 1}).status_code == 201
+
+    response = auth_client.post("/api/cart/add/", {"game_id": game.id, "quantity": 2})
+    assert response.status_code == 400
+    assert CartItem.objects.get(cart__user=user, game=game).quantity == limit - 1
+    assert auth_client.post("/api/cart/add/", {"game_id": game.id}).json()["quantity"] == limit
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cart_add_item_concurrent_adds_are_not_lost(user, make_game):
+    game = make_game()
+    Cart.objects.create(user=user)
+    adds = 24
+
+    def add(_):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            return client.post("/api/cart/add/", {"game_id": game.id}).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(add, range(adds)))
+
+    assert statuses == [201] * adds
+    assert CartItem.objects.get(cart__user=user, game=game).quantity == adds
+
+
+def test_cart_batch_applies_operations_in_order(auth_client, user, make_game):
+    kept, removed, updated, added = (make_game() for _ in range(4))
+    cart = Cart.objects.create(user=user)
+    CartItem.objects.create(cart=cart, game=kept, quantity=1)
+    CartItem.objects.create(cart=cart, game=removed, quantity=1)
+    CartItem.objects.create(cart=cart, game=updated, quantity=1)
+
+    response = auth_client.post("/api/cart/batch/", {"operations": [
+        {"op": "remove", "game_id": removed.id},
+        {"op": "set", "game_id": updated.id, "quantity": 4},
+        {"op": "add", "game_id": added.id},
+        {"op": "add", "game_id": added.id, "quantity": 2},
+    ]}, format="json")
+
+    assert response.status_code == 200
+    quantities = {i["game"]["id"]: i["quantity"] for i in response.json()["items"]}
+    assert quantities == {kept.id: 1, updated.id: 4, added.id: 3}
+
+
+def test_cart_batch_rejects_unknown_games_without_changes(auth_client, user, make_game):
+    game = make_game()
+    response = auth_client.post("/api/cart/batch/", {"operations": [
+        {"op": "add", "game_id": game.id},
+        {"op": "add", "game_id": 999999},
+    ]}, format="json")
+
+    assert response.status_code == 404
+    assert response.json()["game_ids"] == [999999]
+    assert not CartItem.objects.filter(cart__user=user).exists()
+
+
+def test_cart_batch_validates_operations(auth_client):
+    response = auth_client.post("/api/cart/batch/", {"operations": [{"op": "set", "game_id": 1}]}, format="json")
+    assert response.status_code == 400
+
+
+def test_cart_batch_quantity_capped(auth_client, user, make_game):
+    game = make_game()
+    limit = CartItem.MAX_QUANTITY
+    response = auth_client.post("/api/cart/batch/", {"operations": [
+        {"op": "set", "game_id": game.id, "quantity": 10**12},
+    ]}, format="json")
+    assert response.status_code == 400
+
+    response = auth_client.post("/api/cart/batch/", {"operations": [
+        {"op": "set", "game_id": game.id, "quantity": limit},
+        {"op": "add", "game_id": game.id},
+    ]}, format="json")
+    assert (response.status_code, response.json()["game_ids"]) == (400, [game.id])
+    assert not CartItem.objects.filter(cart__user=user).exists()
+
+
+@pytest.fixture
+def filled_cart(user, make_game):
+    cart = Cart.objects.create(user=user)
+    games = [make_game(price=Decimal("30.00")), make_game(price=Decimal("15.50"))]
+    CartItem.objects.create(cart=cart, game=games[0], quantity=1)
+    CartItem.objects.create(cart=cart, game=games[1], quantity=2)
+    return games
+
+
+def test_checkout_creates_order_with_price_snapshots(auth_client, user, filled_cart):
+    response = auth_client.post("/api/checkout/")
+    assert response.status_code == 201
+
+    order = Order.objects.get(user=user)
+    assert order.total_price == Decimal("61.00")
+    assert sorted(order.orderitem_set.values_list("price_snapshot", flat=True)) == [
+        Decimal("15.50"), Decimal("15.50"), Decimal("30.00"),
+    ]
+    assert set(user.library.values_list("id", flat=True)) == {g.id for g in filled_cart}
+    assert not CartItem.objects.filter(cart__user=user).exists()
+
+    # późniejsza zmiana ceny nie wpływa na zamówienie
+    filled_cart[0].price = Decimal("99.00")
+    filled_cart[0].save()
+    assert auth_client.get("/api/cart/").json()["items"] == []
+    order.refresh_from_db()
+    assert order.total_price == Decimal("61.00")
+
+
+def test_checkout_is_idempotent(auth_client, user, filled_cart):
+    first = auth_client.post("/api/checkout/", HTTP_IDEMPOTENCY_KEY="klucz-1")
+    retry = auth_client.post("/api/checkout/", HTTP_IDEMPOTENCY_KEY="klucz-1")
+
+    assert (first.status_code, retry.status_code) == (201, 200)
+    assert first.json()["id"] == retry.json()["id"]
+    assert Order.objects.filter(user=user).count() == 1
+
+
+def test_checkout_reraises_unrelated_integrity_error(user, filled_cart, monkeypatch):
+    def violate(user, idempotency_key):
+        raise IntegrityError("NOT NULL constraint failed")
+
+    monkeypatch.setattr("sklep_gier.checkout._checkout_cart", violate)
+    with pytest.raises(IntegrityError):
+        checkout_cart(user, "klucz-1")
+
+
+def test_checkout_empty_cart(auth_client):
+    assert auth_client.post("/api/checkout/").status_code == 400
+
+
+def test_checkout_rejects_carts_outside_order_limits(auth_client, user, make_game):
+    cart = Cart.objects.create(user=user)
+    games = [make_game(price=Decimal("9999.99")) for _ in range(2)]
+    legacy = CartItem.objects.create(cart=cart, game=games[0], quantity=100_000)
+
+    response = auth_client.post("/api/checkout/")
+    assert (response.status_code, response.json()) == (400, {"detail": "quantity must not exceed 99"})
+
+    legacy.quantity = CartItem.MAX_QUANTITY
+    legacy.save()
+    CartItem.objects.create(cart=cart, game=games[1], quantity=CartItem.MAX_QUANTITY)
+    response = auth_client.post("/api/checkout/")
+    assert (response.status_code, response.json()) == (400, {"detail": "order total must not exceed 999999.99"})
+    assert not Order.objects.exists() and not OrderItem.objects.exists()
+    assert CartItem.objects.filter(cart=cart).count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_checkouts_create_single_order(user, filled_cart):
+    def checkout(_):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            return client.post("/api/checkout/").status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        statuses = sorted(pool.map(checkout, range(4)))
+
+    assert statuses == [201, 400, 400, 400]
+    assert Order.objects.filter(user=user).count() == 1
+
+
+def test_review_create_updates_game_aggregates(auth_client, user, make_game):
+    game = make_game()
+    other = User.objects.create_user(username="inny", email="inny@example.com", password="x")
+    Review.objects.create(user=other, game=game, rating=2)
+
+    response = auth_client.post(f"/api/games/{game.id}/reviews/", {"rating": 5, "comment": "Świetna"})
+    assert response.status_code == 201
+    assert response.json()["nickname"] == "gracz"
+
+    game.refresh_from_db()
+    assert (game.rating_count, game.rating_avg, game.rating_2, game.rating_5) == (2, Decimal("3.50"), 1, 1)
+
+    Review.objects.get(user=other).delete()
+    game.refresh_from_db()
+    assert (game.rating_count, game.rating_avg, game.rating_2) == (1, Decimal("5.00"), 0)
+
+
+def test_review_rating_is_validated(auth_client, make_game):
+    game = make_game()
+    assert auth_client.post(f"/api/games/{game.id}/reviews/", {"rating": 6}).status_code == 400
+    assert auth_client.post(f"/api/games/{game.id}/reviews/", {"rating": 0}).status_code == 400
+
+
+def test_review_list_keyset_pages(api_client, make_game, django_assert_max_num_queries):
+    game = make_game()
+    for i in range(5):
+        reviewer = User.objects.create_user(username=f"recenzent{i}", email=f"r{i}@example.com", password="x")
+        Review.objects.create(user=reviewer, game=game, rating=i + 1)
+
+    with django_assert_max_num_queries(2):
+        first = api_client.get(f"/api/games/{game.id}/reviews/", {"page_size": 2}).json()
+    assert set(first["results"][0]) == {"id", "nickname", "rating", "comment", "created_at"}
+
+    nicknames = [r["nickname"] for r in first["results"]]
+    url = first["next"]
+    while url:
+        page = api_client.get(url).json()
+        nicknames += [r["nickname"] for r in page["results"]]
+        url = page["next"]
+    assert nicknames == [f"recenzent{i}" for i in reversed(range(5))]
+
+
+def test_review_list_unknown_game(api_client):
+    assert api_client.get("/api/games/999999/reviews/").status_code == 404
+
+
+def test_second_review_of_same_game_is_rejected(auth_client, make_game):
+    game = make_game()
+    assert auth_client.post(f"/api/games/{game.id}/reviews/", {"rating": 4}).status_code == 201
+    assert auth_client.post(f"/api/games/{game.id}/reviews/", {"rating": 5}).status_code == 400
+
+    game.refresh_from_db()
+    assert game.rating_count == 1
+
+
+def test_game_list_ordered_by_rating(api_client, user, make_game):
+    games = [make_game() for _ in range(3)]
+    for game, rating in zip(games, (3, 5, 1)):
+        Review.objects.create(user=user, game=game, rating=rating)
+
+    ids = _collect_pages(api_client, "/api/games/?ordering=-rating&page_size=2")
+    assert ids == [games[1].id, games[0].id, games[2].id]
+    response = api_client.get("/api/games/", {"page_size": 10, "rating_min": "3"})
+    assert _ids(response) == {games[0].id, games[1].id}
+
+
+def test_rebuild_review_aggregates_command(user, make_game):
+    game = make_game()
+    Review.objects.create(user=user, game=game, rating=4)
+    Game.objects.filter(pk=game.pk).update(rating_count=99, rating_avg=1, rating_4=0)
+
+    call_command("rebuild_review_aggregates", stdout=StringIO())
+    game.refresh_from_db()
+    assert (game.rating_count, game.rating_avg, game.rating_4) == (1, Decimal("4.00"), 1)
+
+
+def test_order_history_list_and_detail(auth_client, user, make_game, django_assert_max_num_queries):
+    game = make_game(price=Decimal("20.00"))
+    orders = []
+    for _ in range(3):
+        order = Order.objects.create(user=user, total_price=Decimal("40.00"), status="completed")
+        OrderItem.objects.bulk_create([OrderItem(order=order, game=game, price_snapshot=Decimal("20.00"))] * 2)
+        orders.append(order)
+
+    with django_assert_max_num_queries(2):
+        first = auth_client.get("/api/orders/", {"page_size": 2}).json()
+    assert [o["id"] for o in first["results"]] == [orders[2].id, orders[1].id]
+    assert first["results"][0]["item_count"] == 2
+    # kwoty jako napisy dziesiętne, jak w szczegółach zamówienia i pozostałych serializerach
+    assert first["results"][0]["total_price"] == "40.00"
+    assert first["stats"] == {"order_count": 3, "total_spent": "120.00"}
+
+    second = auth_client.get(first["next"]).json()
+    assert [o["id"] for o in second["results"]] == [orders[0].id]
+    assert "stats" not in second
+
+    with django_assert_max_num_queries(2):
+        detail = auth_client.get(f"/api/orders/{orders[0].id}/").json()
+    assert [(i["title"], i["price_snapshot"]) for i in detail["items"]] == [(game.title, "20.00")] * 2
+    assert detail["total_price"] == second["results"][0]["total_price"] == "40.00"
+
+
+def test_order_detail_of_other_user(auth_client, make_game):
+    other = User.objects.create_user(username="inny", email="inny@example.com", password="x")
+    order = Order.objects.create(user=other, total_price=Decimal("0.00"))
+    assert auth_client.get(f"/api/orders/{order.id}/").status_code == 404
+
+
+@pytest.fixture
+def owned_games(user, make_game):
+    """Trzech graczy: a+b+c, a+b, a+d – b jest najbliżej a."""
+    a, b, c, d = (make_game() for _ in range(4))
+    libraries = ([a, b, c], [a, b], [a, d])
+    for i, games in enumerate(libraries):
+        player = User.objects.create_user(username=f"gracz{i}", email=f"g{i}@example.com", password="x")
+        player.library.set(games)
+    return a, b, c, d
+
+
+def test_similar_games_from_library_cooccurrence(api_client, owned_games):
+    a, b, c, d = owned_games
+    rebuild_similarities(top_k=2, chunk_size=2)
+
+    response = api_client.get(f"/api/games/{a.id}/similar/")
+    assert [g["id"] for g in response.json()] == [b.id, c.id]
+    assert GameSimilarity.objects.filter(game=a).count() == 2
+
+
+def test_recommendations_skip_owned_games(auth_client, user, owned_games):
+    a, b, c, d = owned_games
+    rebuild_similarities(top_k=3)
+    user.library.add(b)
+
+    response = auth_client.get("/api/recommendations/")
+    assert [g["id"] for g in response.json()] == [a.id, c.id]
+
+
+def test_cooccurrence_skips_games_added_during_rebuild(owned_games, make_game):
+    a, b, c, d = owned_games
+    snapshot = np.array(sorted(game.id for game in owned_games), dtype=np.int64)
+    late = make_game()
+    User.objects.get(username="gracz0").library.add(late)
+
+    cooccurrence = build_cooccurrence(snapshot, chunk_size=2)
+    assert cooccurrence.shape == (4, 4)
+    assert cooccurrence.diagonal().tolist() == [3, 2, 1, 1]
+
+
+def _similarity_state():
+    return (
+        set(GameCooccurrence.objects.values_list("game_id", "other_id", "count")),
+        set(GameSimilarity.objects.values_list("game_id", "similar_id", "rank")),
+    )
+
+
+def test_incremental_recommendations_match_full_rebuild(auth_client, user, owned_games):
+    a, b, c, d = owned_games
+    rebuild_similarities(top_k=3)
+    assert not LibraryChangeEvent.objects.exists()
+
+    user.library.add(c, d)
+    User.objects.get(username="gracz1").library.remove(b, d)
+    d.owned_by.clear()
+    CartItem.objects.create(cart=Cart.objects.create(user=user), game=b, quantity=1)
+    assert auth_client.post("/api/checkout/").status_code == 201
+    # usunięcie d, którego gracz1 nie miał, nie trafia do dziennika
+    assert LibraryChangeEvent.objects.count() == 6
+
+    call_command("update_recommendations", stdout=StringIO())
+    assert not LibraryChangeEvent.objects.exists()
+    incremental = _similarity_state()
+
+    rebuild_similarities(top_k=3)
+    assert incremental == _similarity_state()
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _cover(size=(400, 600), mode="RGB", color="red"):
+    buffer = BytesIO()
+    Image.new(mode, size, color).save(buffer, format="PNG")
+    return SimpleUploadedFile("cover.png", buffer.getvalue(), content_type="image/png")
+
+
+def test_cover_variants_generated_on_upload(api_client, make_game, media_root):
+    game = make_game(cover_image=_cover())
+    assert [width for width, _ in game.cover_variants["webp"]] == [160, 320, 400]
+    assert (media_root / "game_covers" / "variants").is_dir()
+
+    data = api_client.get(f"/api/games/{game.id}/").json()
+    webp = data["cover_srcset"]["webp"].split(", ")
+    assert webp[0].startswith("http://testserver/media/game_covers/variants/")
+    assert webp[0].endswith(".webp 160w") and webp[-1].endswith(".webp 400w")
+    assert data["cover_srcset"]["jpeg"].endswith(".jpg 400w")
+    assert data["cover_image"] == f"http://testserver/media/{game.cover_image.name}"
+
+
+def test_transparent_cover_keeps_alpha_in_webp_only(make_game, media_root):
+    game = make_game(cover_image=_cover(size=(100, 100), mode="RGBA", color=(255, 0, 0, 0)))
+    files = {
+        key: media_root / game.cover_variants[key][0][1].removeprefix("/media/")
+        for key in ("webp", "jpeg")
+    }
+    with Image.open(files["webp"]) as webp:
+        assert webp.mode == "RGBA" and webp.getpixel((50, 50))[3] == 0
+    with Image.open(files["jpeg"]) as jpeg:
+        assert all(channel > 245 for channel in jpeg.convert("RGB").getpixel((50, 50)))
+
+
+def test_build_cover_variants_backfill(make_game, media_root, django_assert_num_queries):
+    games = [make_game(title=f"Gra {i}", cover_image=_cover()) for i in range(3)]
+    expected = {game.pk: game.cover_variants for game in games}
+    Game.objects.update(cover_variants={})
+
+    # 3 gry przy --batch-size 2: dwie porcje po (SELECT + zapis w transakcji), pusty SELECT kończy
+    with django_assert_num_queries(9):
+        call_command("build_cover_variants", workers=1, batch_size=2, stdout=StringIO())
+    # nazwy z hashem treści – ten sam plik daje te same adresy
+    for game in games:
+        game.refresh_from_db()
+        assert game.cover_variants == expected[game.pk]
+
+
+@pytest.fixture
+def media_file(media_root):
+    path = media_root / "game_covers" / "variants"
+    path.mkdir(parents=True)
+    (path / "abc-160.webp").write_bytes(b"0123456789")
+    return "/media/game_covers/variants/abc-160.webp"
+
+
+def test_media_hashed_files_cached_forever(api_client, media_file):
+    response = api_client.get(media_file)
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == b"0123456789"
+    assert "immutable" in response["Cache-Control"]
+    assert response["Content-Type"] == "image/webp"
+
+    assert api_client.get(media_file, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+    assert api_client.get("/media/../settings.py").status_code == 404
+
+
+def test_media_range_requests(api_client, media_file):
+    response = api_client.get(media_file, HTTP_RANGE="bytes=2-5")
+    assert response.status_code == 206
+    assert response["Content-Range"] == "bytes 2-5/10"
+    assert b"".join(response.streaming_content) == b"2345"
+
+    suffix = api_client.get(media_file, HTTP_RANGE="bytes=-3")
+    assert b"".join(suffix.streaming_content) == b"789"
+    assert api_client.get(media_file, HTTP_RANGE="bytes=20-").status_code == 416
+    # If-Range z nieaktualnym ETagiem – cały plik
+    assert api_client.get(media_file, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"stary"').status_code == 200
+
+
+def test_media_precompressed_and_offload(api_client, media_root, settings):
+    (media_root / "opis.txt").write_bytes(b"tekst")
+    (media_root / "opis.txt.gz").write_bytes(b"gzip")
+
+    response = api_client.get("/media/opis.txt", HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert response["Content-Encoding"] == "gzip"
+    assert b"".join(response.streaming_content) == b"gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert "immutable" not in response["Cache-Control"]
+
+    settings.MEDIA_ACCEL_REDIRECT = "/protected-media/"
+    response = api_client.get("/media/opis.txt")
+    assert response["X-Accel-Redirect"] == "/protected-media/opis.txt"
+    assert response.content == b""
+
+
+def test_async_catalog_matches_sync(api_client, make_game, genre):
+    game = make_game(genres=[genre])
+    make_game()
+
+    for sync_path, async_path in (
+        ("/api/publishers/", "/api/async/publishers/"),
+        ("/api/games/", "/api/async/games/"),
+        (f"/api/games/{game.id}/", f"/api/async/games/{game.id}/"),
+        (f"/api/games/?genre={genre.id}", f"/api/async/games/?genre={genre.id}"),
+    ):
+        assert api_client.get(async_path).json() == api_client.get(sync_path).json()
+
+    assert api_client.get("/api/async/games/0/").status_code == 404
+    assert api_client.get("/api/async/games/?price_min=abc").status_code == 400
+
+
+def test_async_library_requires_jwt(api_client, user, make_game):
+    user.library.add(make_game())
+    assert api_client.get("/api/async/library/").status_code == 401
+    assert api_client.get("/api/async/library/", HTTP_AUTHORIZATION="Bearer zly").status_code == 401
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    response = api_client.get("/api/async/library/")
+    assert response.status_code == 200
+    assert response.json() == api_client.get("/api/library/").json()
+    assert api_client.get("/api/async/library/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+
+def test_health_reports_databases(api_client):
+    response = api_client.get("/api/health/")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok", "databases": {"default": "ok"}}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_replica_router_only_for_marked_reads(settings):
+    settings.DATABASE_REPLICAS = ["replica_1"]
+    router = ReadReplicaRouter()
+    assert router.db_for_read(Game) is None
+
+    token = use_replica.set(True)
+    try:
+        assert router.db_for_read(Game) == "replica_1"
+        assert router.db_for_write(Game) == "default"
+        with transaction.atomic():
+            assert router.db_for_read(Game) is None
+    finally:
+        use_replica.reset(token)
+
+
+def test_import_catalog_upserts_games(publisher, genre, tmp_path):
+    feed = tmp_path / "feed.jsonl.gz"
+    rows = [
+        {"external_id": "w3", "title": "Wiedźmin 3", "price": "99.99", "release_date": "2015-05-19",
+         "publisher": "CD Projekt", "genres": ["RPG", "Akcja"]},
+        {"external_id": "x1", "title": "Nowa gra", "price": "10", "release_date": "2024-01-01",
+         "publisher": "Nowy wydawca", "genres": "Akcja"},
+        {"external_id": "zly", "title": "Bez daty", "publisher": "CD Projekt"},
+        {"external_id": "drogi", "title": "Za droga", "price": "10000", "release_date": "2024-01-01",
+         "publisher": "CD Projekt"},
+        {"external_id": "ujemny", "title": "Ujemna", "price": "-1", "release_date": "2024-01-01",
+         "publisher": "CD Projekt"},
+        {"external_id": "nan", "title": "NaN", "price": "NaN", "release_date": "2024-01-01",
+         "publisher": "CD Projekt"},
+        {"external_id": "dlugi", "title": "Długi gatunek", "price": "5", "release_date": "2024-01-01",
+         "publisher": "CD Projekt", "genres": ["x" * 150]},
+        {"external_id": "bez_ceny", "title": "Bez ceny", "release_date": "2024-01-01", "publisher": "CD Projekt"},
+        {"external_id": "pusta_cena", "title": "Pusta cena", "price": " ", "release_date": "2024-01-01",
+         "publisher": "CD Projekt"},
+    ]
+    with gzip.open(feed, "wt") as file:
+        file.writelines(json.dumps(row) + "\n" for row in rows)
+
+    call_command("import_catalog", str(feed), dry_run=True, stdout=StringIO(), stderr=StringIO())
+    assert not Game.objects.exists() and not Publisher.objects.filter(name="Nowy wydawca").exists()
+
+    out, err = StringIO(), StringIO()
+    call_command("import_catalog", str(feed), batch_size=2, stdout=out, stderr=err)
+    assert "3 nowych i 0 zaktualizowanych" in out.getvalue()
+    assert err.getvalue().count("poza zakresem") == 3
+    assert err.getvalue().count("wymagana cena") == 3
+    assert not Game.objects.filter(external_id__in=["drogi", "ujemny", "nan", "bez_ceny", "pusta_cena"]).exists()
+    assert Game.objects.get(external_id="dlugi").genres.get().name == "x" * 100
+    witcher = Game.objects.get(external_id="w3")
+    assert witcher.publisher == publisher
+    assert sorted(witcher.genres.values_list("name", flat=True)) == ["Akcja", "RPG"]
+
+    rows[0].update(price="49.99", genres=["RPG"])
+    with gzip.open(feed, "wt") as file:
+        file.writelines(json.dumps(row) + "\n" for row in rows)
+    out = StringIO()
+    call_command("import_catalog", str(feed), stdout=out, stderr=StringIO())
+    assert "0 nowych i 1 zaktualizowanych gier (2 bez zmian)" in out.getvalue()
+    witcher.refresh_from_db()
+    assert witcher.price == Decimal("49.99")
+    assert list(witcher.genres.values_list("name", flat=True)) == ["RPG"]
+    assert Genre.objects.filter(name="Akcja").count() == 1
+
+
+def test_import_catalog_reimport_leaves_delta_empty(api_client, publisher, genre, tmp_path):
+    feed = tmp_path / "feed.csv"
+    feed.write_text(
+        "external_id,title,description,price,release_date,publisher,genres\n"
+        "w3,Wiedźmin 3,Opis,99.99,2015-05-19,CD Projekt,RPG|Akcja\n"
+        "x1,Nowa gra,,10,2024-01-01,Nowy wydawca,Akcja\n",
+        encoding="utf-8",
+    )
+    call_command("import_catalog", str(feed), stdout=StringIO(), stderr=StringIO())
+    since = timezone.now()
+
+    out = StringIO()
+    call_command("import_catalog", str(feed), stdout=out, stderr=StringIO())
+    assert "0 nowych i 0 zaktualizowanych gier (2 bez zmian)" in out.getvalue()
+    assert not Game.objects.filter(updated_at__gt=since).exists()
+    delta = api_client.get("/api/sync/catalog/", {"since": since.isoformat()}).json()
+    assert delta["games"] == {"changed": [], "deleted": []}
+
+
+def test_catalog_export_streams_ndjson_csv_and_deltas(api_client, make_game, genre):
+    action = Genre.objects.create(name="Akcja")
+    old = make_game(title="Stara", external_id="old", genres=[genre])
+    new = make_game(title="Nowa", price=Decimal("10.00"), genres=[genre, action])
+    Game.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+    response = api_client.get("/api/catalog/export/")
+    assert response.status_code == 200 and response.streaming
+    rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    assert [row["id"] for row in rows] == [old.id, new.id]
+    assert rows[1]["genres"] == ["Akcja", "RPG"] and rows[1]["price"] == "10.00"
+    assert rows[0]["external_id"] == "old" and rows[0]["publisher"] == "CD Projekt"
+
+    response = api_client.get("/api/catalog/export/?format=csv", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+    assert lines[0].startswith("id,external_id,title") and "Akcja|RPG" in lines[2]
+
+    since = (timezone.now() - timedelta(days=1)).isoformat()
+    response = api_client.get("/api/catalog/export/", {"updated_since": since})
+    rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    assert [row["id"] for row in rows] == [new.id]
+    assert api_client.get("/api/catalog/export/?updated_since=wczoraj").status_code == 400
+
+
+def test_sync_catalog_returns_changed_and_deleted_ids(api_client, make_game, publisher, genre):
+    kept, renamed, removed = make_game(), make_game(genres=[genre]), make_game()
+    action = Genre.objects.create(name="Akcja")
+    Game.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+    Genre.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+    Publisher.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    full = api_client.get("/api/sync/catalog/").json()
+    assert full["full"] and full["games"]["changed"] == [kept.id, renamed.id, removed.id]
+    since = (timezone.now() - timedelta(minutes=1)).isoformat()
+
+    genre.name = "Role-playing"
+    genre.save()  # zmienia dane gier z tym gatunkiem
+    kept.genres.add(action)
+    removed_id = removed.id
+    removed.delete()
+    data = api_client.get("/api/sync/catalog/", {"since": since}).json()
+    assert not data["full"]
+    assert data["games"] == {"changed": [kept.id, renamed.id], "deleted": [removed_id]}
+    assert data["genres"] == {"changed": [genre.id], "deleted": []}
+    assert data["publishers"] == {"changed": [], "deleted": []}
+
+    assert api_client.get("/api/sync/catalog/", {"since": data["timestamp"]}).json()["games"]["deleted"] == [removed_id]
+    old = (timezone.now() - timedelta(days=60)).isoformat()
+    assert api_client.get("/api/sync/catalog/", {"since": old}).json()["full"]
+    assert api_client.get("/api/sync/catalog/?since=wczoraj").status_code == 400
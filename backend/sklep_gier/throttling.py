@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+
+def take_token(key, capacity, refill_rate, now=None):
+    """
+    Kubełek tokenów w cache: ``capacity`` żądań naraz, uzupełniany o ``refill_rate``
+    tokenów na sekundę. Zwraca 0, gdy token pobrano, albo liczbę sekund do
+    następnego tokenu. Bez blokad – przy wyścigu kubełek może przepuścić pojedyncze
+    żądanie za dużo, co przy limitach logowania jest akceptowalne.
+    """
+    now = time.time() if now is None else now
+    tokens, updated = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill_rate)
+    # klucz wygasa, gdy kubełek i tak byłby już pełny
+    timeout = int(capacity / refill_rate) + 1
+    if tokens < 1:
+        cache.set(key, (tokens, now), timeout=timeout)
+        return (1 - tokens) / refill_rate
+    cache.set(key, (tokens - 1, now), timeout=timeout)
+    return 0
+
+
+class LoginThrottle(BaseThrottle):
+    """
+    Limit prób logowania osobno per adres IP i per e-mail (LOGIN_THROTTLE_RATES).
+    Throttle DRF działa w ``initial()``, więc odrzucone żądanie nie dochodzi do
+    weryfikacji hasła i nie zużywa CPU na hashowanie.
+    """
+
+    def allow_request(self, request, view):
+        rates = settings.LOGIN_THROTTLE_RATES
+        buckets = [("ip", self.get_ident(request))]
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if isinstance(email, str) and email:
+            buckets.append(("email", email.strip().lower()))
+
+        self.retry_after = 0
+        for scope, ident in buckets:
+            capacity, refill_rate = rates[scope]
+            wait = take_token(f"throttle:login:{scope}:{ident}", capacity, refill_rate)
+            self.retry_after = max(self.retry_after, wait)
+        return self.retry_after == 0
+
+    def wait(self):
+        return self.retry_after
@@ -1,13 +1,19 @@
+from decimal import Decimal
+
 from django.shortcuts import render
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, serializers
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import Count, F, Prefetch, Sum, prefetch_related_objects
+from django.utils.http import parse_etags, quote_etag
 
-from .models import Publisher, Game, User, Cart, CartItem
+from .models import Publisher, Game, User, Cart, CartItem, Order, OrderItem, Review
 from .serializers import (
     GenreSerializer,
     PublisherSerializer,
@@ -15,14 +21,64 @@ from .serializers import (
     EmailTokenObtainPairSerializer,
     CartSerializer,
     CartItemSerializer,
+    CartBatchSerializer,
+    OrderSerializer,
+    ReviewSerializer,
+)
+from .cache import (
+    cache_catalog_response,
+    catalog_generation,
+    check_etag_preconditions,
+    user_etag,
 )
+from .checkout import EmptyCartError, OrderLimitError, checkout_cart
+from .filters import GameFacetFilter, game_facets
+from .pagination import GameKeysetPagination, OrderKeysetPagination, ReviewKeysetPagination
+from .recommendations import recommended_games, similar_games
+from .search import search_games
+from .sync import catalog_changes, parse_timestamp, sync_cursor
+from .throttling import LoginThrottle
 
 # Testowy endpoint
 @api_view(['GET'])
 def hello(request):
     return Response({"msg": "Test"})
 
+# Stan połączeń z bazą (główną i replikami) dla load balancera / orkiestratora
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def health(request):
+    databases = {}
+    for alias in connections:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            databases[alias] = "ok"
+        except DatabaseError:
+            databases[alias] = "unavailable"
+    healthy = all(state == "ok" for state in databases.values())
+    return Response(
+        {"status": "ok" if healthy else "unavailable", "databases": databases},
+        status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+# Zmiany katalogu od ?since= (wartość "timestamp" z poprzedniej odpowiedzi) – same id,
+# klient dociąga zmienione obiekty zwykłymi endpointami i usuwa "deleted" z lokalnej kopii
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def sync_catalog(request):
+    since = request.query_params.get("since")
+    if since is not None:
+        since = parse_timestamp(since)
+        if since is None:
+            return Response({"detail": "since must be an ISO 8601 timestamp"}, status=status.HTTP_400_BAD_REQUEST)
+    timestamp = sync_cursor()
+    full, changes = catalog_changes(since)
+    return Response({"timestamp": timestamp, "full": full, **changes})
+
+
 # Endpoint do pobierania wydawców
+@cache_catalog_response
 @api_view(['GET'])
 def get_publishers(request):
     publishers = Publisher.objects.all().values('id', 'name', 'website')
@@ -31,6 +87,25 @@ def get_publishers(request):
 
 class EmailTokenObtainPairView(TokenObtainPairView):
     serializer_class = EmailTokenObtainPairSerializer
+    # limit sprawdzany przed walidacją, czyli przed kosztownym sprawdzeniem hasła
+    throttle_classes = [LoginThrottle]
+
+
+REGISTER_CONFLICT_MESSAGES = {
+    "email": "email already registered",
+    "username": "nickname already taken",
+}
+
+
+def unique_violation_field(exc):
+    """Pole User, którego ograniczenie unikalności naruszono (email/username), albo None."""
+    # PostgreSQL podaje nazwę ograniczenia w diagnostyce, SQLite tylko w treści błędu
+    diag = getattr(exc.__cause__, "diag", None)
+    detail = getattr(diag, "constraint_name", None) or str(exc)
+    for field in REGISTER_CONFLICT_MESSAGES:
+        if field in detail:
+            return field
+    return None
 
 
 @api_view(["POST"])
@@ -64,25 +139,25 @@ def register(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    if User.objects.filter(email__iexact=email).exists():
-        return Response(
-            {"detail": "email already registered"},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-    if nickname and User.objects.filter(username=nickname).exists():
+    # unikalność sprawdza baza (email bez względu na wielkość liter, nickname) – jeden INSERT
+    try:
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=nickname,
+                email=email,
+                password=password,
+                first_name=first_name,
+                last_name=last_name,
+                birth_date=birth_date,
+            )
+    except IntegrityError as exc:
+        field = unique_violation_field(exc)
+        if field is None:
+            raise
         return Response(
-            {"detail": "nickname already taken"},
+            {"detail": REGISTER_CONFLICT_MESSAGES[field]},
             status=status.HTTP_400_BAD_REQUEST,
         )
-
-    user = User.objects.create_user(
-        username=nickname,
-        email=email,
-        password=password,
-        first_name=first_name,
-        last_name=last_name,
-        birth_date=birth_date,
-    )
     return Response(
         {
             "id": user.id,
@@ -95,8 +170,95 @@ def register(request):
 
 # Widok tylko do odczytu gier
 class GameViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Game.objects.prefetch_related("genres").all()
+    queryset = Game.objects.with_related()
     serializer_class = GameSerializer
+    pagination_class = GameKeysetPagination
+    filter_backends = [GameFacetFilter]
+    lookup_value_regex = r"\d+"
+    default_limit = 20
+    max_limit = 50
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        return cache_catalog_response(super().as_view(actions, **initkwargs))
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def list(self, request, *args, **kwargs):
+        """
+        Lista gier z filtrami (GameFacetFilter). W trybie stronicowanym pierwsza
+        strona (bez ``cursor``) zawiera też liczniki gatunków i wydawców dla bieżącego
+        filtra – kolejne strony ich nie liczą, żeby głębokie strony miały stały koszt.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        if self.paginator.cursor_query_param not in request.query_params:
+            response.data["facets"] = game_facets(queryset)
+        return response
+
+    @action(detail=True, methods=["get", "post"])
+    def reviews(self, request, pk=None):
+        """
+        GET  – recenzje gry, najnowsze najpierw, stronicowane kursorem (?cursor=, ?page_size=).
+        POST – dodanie recenzji: {"rating": 1-5, "comment": "..."} (wymaga zalogowania).
+        Agregaty ocen gry aktualizują się w tej samej transakcji (signals.py).
+        """
+        if request.method == "POST":
+            game = self.get_object()
+            serializer = ReviewSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            try:
+                with transaction.atomic():
+                    serializer.save(user=request.user, game=game)
+            except IntegrityError:
+                return Response({"detail": "game already reviewed"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        if not Game.objects.filter(pk=pk).exists():
+            raise NotFound
+        # tylko potrzebne kolumny (bez pełnych obiektów User), strony po kursorze (created_at, id)
+        reviews = Review.objects.filter(game_id=pk).values(
+            "id", "rating", "comment", "created_at", nickname=F("user__username")
+        )
+        paginator = ReviewKeysetPagination()
+        page = paginator.paginate_queryset(reviews, request, view=self)
+        return paginator.get_paginated_response(page)
+
+    @action(detail=True, methods=["get"])
+    def similar(self, request, pk=None):
+        """
+        Gry podobne ("gracze, którzy mają tę grę, mają też..."): /api/games/{id}/similar/?limit=<n>
+        """
+        limit = self.get_limit(request)
+        games = similar_games(self.get_queryset(), pk, limit)
+        serializer = self.get_serializer(games, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Wyszukiwanie pełnotekstowe: /api/games/search/?q=<fraza>&limit=<n>
+        Przeszukuje tytuł, opis, wydawcę i gatunki; wyniki wg trafności.
+        """
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response({"detail": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = self.get_limit(request)
+        games = search_games(self.filter_queryset(self.get_queryset()), text, limit)
+        serializer = self.get_serializer(games, many=True)
+        return Response(serializer.data)
 
 
 # Endpoint dla biblioteki
@@ -106,9 +268,15 @@ def library(request):
     user = request.user
 
     if request.method == "GET":
-        games = user.library.all()
+        # ETag z wersji biblioteki – niezmieniona biblioteka to 304 bez serializacji
+        etag = user_etag("library", user.pk)
+        not_modified = check_etag_preconditions(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        games = user.library.with_related()
         data = GameSerializer(games, many=True, context={"request": request}).data
-        return Response(data)
+        return Response(data, headers={"ETag": etag})
 
     if request.method == "POST":
         game_id = request.data.get("game")
@@ -137,6 +305,22 @@ def library(request):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+# Rekomendacje na podstawie biblioteki
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def recommendations(request):
+    """
+    Gry polecane zalogowanemu użytkownikowi na podstawie jego biblioteki (?limit=<n>, max 50).
+    """
+    try:
+        limit = max(1, min(int(request.query_params.get("limit", 20)), 50))
+    except ValueError:
+        limit = 20
+    games = recommended_games(Game.objects.with_related(), request.user, limit)
+    data = GameSerializer(games, many=True, context={"request": request}).data
+    return Response(data)
+
+
 #
 # ---- DODANE: Widoki dla koszyka ----
 #
@@ -149,6 +333,63 @@ def get_or_create_cart(user):
     return cart
 
 
+def lock_cart(user):
+    """
+    Koszyk użytkownika zablokowany do końca transakcji (SELECT ... FOR UPDATE).
+    Zmiany koszyka sprawdzają If-Match i podbijają wersję pod tą blokadą, więc dwa
+    żądania z tym samym ETagiem nie przejdą oba.
+    """
+    cart, created = Cart.objects.select_for_update().get_or_create(user=user)
+    return cart
+
+
+def cart_etag(cart):
+    # brak koszyka to pusty koszyk w wersji 0; odpowiedź zawiera też ceny, tytuły i okładki
+    # gier, więc zmiana katalogu również unieważnia ETag
+    return quote_etag(f"cart-{cart.version if cart is not None else 0}-{catalog_generation()}")
+
+
+def check_cart_if_match(request, cart):
+    """
+    If-Match dla zmian koszyka: porównuje tylko wersję koszyka z ETagu. Zmiana katalogu
+    daje nowy ETag dla GET, ale nie jest konfliktem zapisu – inaczej każda edycja gry
+    kończyłaby się 412 we wszystkich otwartych koszykach. Zwraca 412 albo None.
+    """
+    if_match = request.headers.get("If-Match")
+    if if_match is None:
+        return None
+    prefix = f'"cart-{cart.version}-'
+    etags = parse_etags(if_match)
+    if "*" in etags or any(etag.startswith(prefix) for etag in etags):
+        return None
+    return Response(status=status.HTTP_412_PRECONDITION_FAILED, headers={"ETag": cart_etag(cart)})
+
+
+def prefetch_cart_items(cart):
+    """
+    Dociąga pozycje koszyka razem z grami, wydawcami, gatunkami i sumami częściowymi,
+    żeby CartSerializer nie odpytywał bazy osobno dla każdej pozycji.
+    """
+    items = (
+        CartItem.objects.with_subtotals()
+        .select_related("game__publisher")
+        .prefetch_related("game__genres")
+    )
+    prefetch_related_objects([cart], Prefetch("cartitem_set", queryset=items))
+    return cart
+
+
+def get_cart_with_totals(user):
+    """
+    Koszyk z łączną ceną policzoną w bazie (jedno zapytanie) i pozycjami z sumami częściowymi.
+    """
+    cart = Cart.objects.with_total_price().filter(user=user).first()
+    if cart is None:
+        cart = get_or_create_cart(user)
+        cart.total_price = Decimal("0.00")
+    return prefetch_cart_items(cart)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def cart_detail(request):
@@ -158,9 +399,18 @@ def cart_detail(request):
     – łączna cena
     """
     user = request.user
-    cart = get_or_create_cart(user)
-    serializer = CartSerializer(cart, context={"request": request})
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # wersja przychodzi razem z sumą koszyka – 304 kosztuje jedno zapytanie
+    cart = Cart.objects.with_total_price().filter(user=user).first()
+    etag = cart_etag(cart)
+    not_modified = check_etag_preconditions(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    if cart is None:
+        cart = get_or_create_cart(user)
+        cart.total_price = Decimal("0.00")
+    serializer = CartSerializer(prefetch_cart_items(cart), context={"request": request})
+    return Response(serializer.data, status=status.HTTP_200_OK, headers={"ETag": etag})
 
 
 @api_view(["POST"])
@@ -172,6 +422,7 @@ def cart_add_item(request):
         "game_id": <int>,
         "quantity": <int>  # opcjonalne, default=1
     }
+    Nagłówek If-Match z ETagiem koszyka chroni przed nadpisaniem równoległej zmiany (412).
     """
     user = request.user
     data = request.data
@@ -182,20 +433,116 @@ def cart_add_item(request):
         return Response({"detail": "game_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        game = Game.objects.get(pk=game_id)
-    except Game.DoesNotExist:
-        return Response({"detail": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
-
-    cart = get_or_create_cart(user)
-    cart_item, created = CartItem.objects.get_or_create(cart=cart, game=game)
-    if not created:
-        cart_item.quantity += int(quantity)
-    else:
-        cart_item.quantity = int(quantity)
-    cart_item.save()
+        game_id = int(game_id)
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        return Response({"detail": "game_id and quantity must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+    if quantity <= 0:
+        return Response({"detail": "quantity must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+    if quantity > CartItem.MAX_QUANTITY:
+        return Response(
+            {"detail": f"quantity must not exceed {CartItem.MAX_QUANTITY}"}, status=status.HTTP_400_BAD_REQUEST
+        )
 
+    with transaction.atomic():
+        cart = lock_cart(user)
+        precondition_failed = check_cart_if_match(request, cart)
+        if precondition_failed is not None:
+            return precondition_failed
+
+        # jedno polecenie INSERT ... ON CONFLICT zamiast get_or_create + odczyt-modyfikacja-zapis
+        item_id = CartItem.objects.add_quantity(cart, game_id, quantity)
+        if item_id is None:
+            if Game.objects.filter(pk=game_id).exists():
+                return Response(
+                    {"detail": f"quantity in cart must not exceed {CartItem.MAX_QUANTITY}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            return Response({"detail": "Game not found"}, status=status.HTTP_404_NOT_FOUND)
+        cart.bump_version()
+
+    cart_item = CartItem.objects.select_related("game__publisher").get(pk=item_id)
     serializer = CartItemSerializer(cart_item, context={"request": request})
-    return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.data, status=status.HTTP_201_CREATED, headers={"ETag": cart_etag(cart)})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def cart_batch(request):
+    """
+    Zbiorcza zmiana koszyka w jednej transakcji (synchronizacja koszyka,
+    scalanie koszyka gościa po zalogowaniu).
+    Oczekiwane dane w body: {
+        "operations": [
+            {"op": "add", "game_id": <int>, "quantity": <int>},     # quantity opcjonalne, default=1
+            {"op": "set", "game_id": <int>, "quantity": <int>},     # 0 usuwa pozycję
+            {"op": "remove", "game_id": <int>}
+        ]
+    }
+    Zwraca cały koszyk po zmianach.
+    """
+    user = request.user
+    serializer = CartBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    operations = serializer.validated_data["operations"]
+
+    game_ids = {op["game_id"] for op in operations}
+    missing = game_ids - set(Game.objects.filter(pk__in=game_ids).values_list("pk", flat=True))
+    if missing:
+        return Response(
+            {"detail": "Game not found", "game_ids": sorted(missing)},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    with transaction.atomic():
+        # blokada koszyka szereguje równoległe zmiany tego samego użytkownika
+        cart = lock_cart(user)
+        precondition_failed = check_cart_if_match(request, cart)
+        if precondition_failed is not None:
+            return precondition_failed
+        items = {item.game_id: item for item in CartItem.objects.filter(cart=cart)}
+
+        quantities = {game_id: item.quantity for game_id, item in items.items()}
+        for op in operations:
+            game_id = op["game_id"]
+            if op["op"] == "add":
+                quantities[game_id] = quantities.get(game_id, 0) + op["quantity"]
+            elif op["op"] == "set":
+                quantities[game_id] = op["quantity"]
+            else:
+                quantities[game_id] = 0
+        # kilka operacji "add" na tej samej grze może razem przekroczyć limit pozycji
+        over_limit = sorted(game_id for game_id, qty in quantities.items() if qty > CartItem.MAX_QUANTITY)
+        if over_limit:
+            return Response(
+                {"detail": f"quantity must not exceed {CartItem.MAX_QUANTITY}", "game_ids": over_limit},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        to_create, to_update, to_delete = [], [], []
+        for game_id, quantity in quantities.items():
+            item = items.get(game_id)
+            if item is None:
+                if quantity > 0:
+                    to_create.append(CartItem(cart=cart, game_id=game_id, quantity=quantity))
+            elif quantity <= 0:
+                to_delete.append(item.pk)
+            elif quantity != item.quantity:
+                item.quantity = quantity
+                to_update.append(item)
+
+        # pozycja mogła zostać dodana równolegle przez cart_add_item – wtedy wygrywa wynik batcha
+        CartItem.objects.bulk_create(
+            to_create, update_conflicts=True, unique_fields=["cart", "game"], update_fields=["quantity"]
+        )
+        CartItem.objects.bulk_update(to_update, ["quantity"])
+        CartItem.objects.filter(pk__in=to_delete).delete()
+        cart.bump_version()
+
+    etag = cart_etag(cart)
+    cart = get_cart_with_totals(user)
+    serializer = CartSerializer(cart, context={"request": request})
+    return Response(serializer.data, status=status.HTTP_200_OK, headers={"ETag": etag})
 
 
 @api_view(["PATCH"])
@@ -206,25 +553,43 @@ def cart_update_item(request, item_id: int):
     Oczekiwane dane w body: {
         "quantity": <int>
     }
+    Nagłówek If-Match z ETagiem koszyka chroni przed nadpisaniem równoległej zmiany (412).
     """
     user = request.user
     new_qty = request.data.get("quantity")
     if new_qty is None:
         return Response({"detail": "quantity is required"}, status=status.HTTP_400_BAD_REQUEST)
-
     try:
-        cart_item = CartItem.objects.get(pk=item_id, cart__user=user)
-    except CartItem.DoesNotExist:
-        return Response({"detail": "CartItem not found"}, status=status.HTTP_404_NOT_FOUND)
+        new_qty = int(new_qty)
+    except (TypeError, ValueError):
+        return Response({"detail": "quantity must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    if new_qty > CartItem.MAX_QUANTITY:
+        return Response(
+            {"detail": f"quantity must not exceed {CartItem.MAX_QUANTITY}"}, status=status.HTTP_400_BAD_REQUEST
+        )
 
-    cart_item.quantity = int(new_qty)
-    if cart_item.quantity <= 0:
-        cart_item.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+    with transaction.atomic():
+        cart = lock_cart(user)
+        precondition_failed = check_cart_if_match(request, cart)
+        if precondition_failed is not None:
+            return precondition_failed
 
-    cart_item.save()
+        try:
+            cart_item = CartItem.objects.select_related("game__publisher").get(pk=item_id, cart=cart)
+        except CartItem.DoesNotExist:
+            return Response({"detail": "CartItem not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        cart_item.quantity = new_qty
+        if cart_item.quantity <= 0:
+            cart_item.delete()
+        else:
+            cart_item.save()
+        cart.bump_version()
+
+    if cart_item.quantity <= 0:
+        return Response(status=status.HTTP_204_NO_CONTENT, headers={"ETag": cart_etag(cart)})
     serializer = CartItemSerializer(cart_item, context={"request": request})
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(serializer.data, status=status.HTTP_200_OK, headers={"ETag": cart_etag(cart)})
 
 
 @api_view(["DELETE"])
@@ -234,10 +599,97 @@ def cart_remove_item(request, item_id: int):
     Usuwa pozycję z koszyka.
     """
     user = request.user
+    with transaction.atomic():
+        cart = lock_cart(user)
+        precondition_failed = check_cart_if_match(request, cart)
+        if precondition_failed is not None:
+            return precondition_failed
+
+        deleted, _ = CartItem.objects.filter(pk=item_id, cart=cart).delete()
+        if not deleted:
+            return Response({"detail": "CartItem not found"}, status=status.HTTP_404_NOT_FOUND)
+        cart.bump_version()
+    return Response(status=status.HTTP_204_NO_CONTENT, headers={"ETag": cart_etag(cart)})
+
+
+#
+# ---- Zamówienia ----
+#
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def checkout(request):
+    """
+    Składa zamówienie z zawartości koszyka: snapshot cen, gry trafiają do biblioteki,
+    koszyk zostaje wyczyszczony.
+    Opcjonalny nagłówek Idempotency-Key – ponowienie z tym samym kluczem zwraca
+    to samo zamówienie (200) zamiast tworzyć nowe (201).
+    """
+    idempotency_key = request.headers.get("Idempotency-Key") or None
+    if idempotency_key is not None and len(idempotency_key) > 64:
+        return Response({"detail": "Idempotency-Key too long"}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
-        cart_item = CartItem.objects.get(pk=item_id, cart__user=user)
-    except CartItem.DoesNotExist:
-        return Response({"detail": "CartItem not found"}, status=status.HTTP_404_NOT_FOUND)
+        order, created = checkout_cart(request.user, idempotency_key)
+    except EmptyCartError:
+        return Response({"detail": "cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
+    except OrderLimitError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-    cart_item.delete()
-    return Response(status=status.HTTP_204_NO_CONTENT)
+    prefetch_related_objects([order], order_items_prefetch())
+    serializer = OrderSerializer(order, context={"request": request})
+    return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+def order_items_prefetch():
+    """Pozycje zamówienia razem z grami – jedno zapytanie niezależnie od liczby pozycji."""
+    return Prefetch("orderitem_set", queryset=OrderItem.objects.select_related("game"))
+
+
+# Reprezentacja kwot poza serializerami; bez max_digits, bo suma zamówień może przekroczyć pole modelu
+MONEY_FIELD = serializers.DecimalField(max_digits=None, decimal_places=2)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def orders(request):
+    """
+    Historia zamówień zalogowanego użytkownika, najnowsze najpierw,
+    stronicowana kursorem (?cursor=, ?page_size=).
+    Pierwsza strona zawiera też statystyki: liczbę zamówień i łączną wydaną kwotę.
+    """
+    user = request.user
+    # lekka projekcja przez values() – bez obiektów modelu i serializera
+    queryset = Order.objects.filter(user=user).values(
+        "id", "status", "created_at", "total_price"
+    ).annotate(item_count=Count("orderitem"))
+
+    paginator = OrderKeysetPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    # kwoty jako napisy "40.00" – tak samo jak w OrderSerializer (order_detail)
+    for row in page:
+        row["total_price"] = MONEY_FIELD.to_representation(row["total_price"])
+    response = paginator.get_paginated_response(page)
+    if paginator.cursor_query_param not in request.query_params:
+        stats = Order.objects.filter(user=user).aggregate(
+            order_count=Count("id"),
+            total_spent=Sum("total_price", default=Decimal("0.00")),
+        )
+        stats["total_spent"] = MONEY_FIELD.to_representation(stats["total_spent"])
+        response.data["stats"] = stats
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def order_detail(request, order_id: int):
+    """
+    Szczegóły zamówienia z pozycjami (snapshot ceny i tytuł gry).
+    """
+    try:
+        order = Order.objects.prefetch_related(order_items_prefetch()).get(pk=order_id, user=request.user)
+    except Order.DoesNotExist:
+        return Response({"detail": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = OrderSerializer(order, context={"request": request})
+    return Response(serializer.data, status=status.HTTP_200_OK)
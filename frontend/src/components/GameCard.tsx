@@ -15,6 +15,7 @@ export interface Game {
   release_date: string;
   genres: Genre[];
   cover_image?: string | null;
+  cover_srcset?: { webp?: string; jpeg?: string } | null;
 }
 
 const chip =
@@ -46,12 +47,19 @@ const GameCard: FC<Props> = ({ game }) => {
           {/* Cover */}
           <div className="aspect-[2/3] w-full overflow-hidden">
             {game.cover_image ? (
-              <img
-                src={game.cover_image}
-                alt={game.title}
-                loading="lazy"
-                className="w-full h-full object-cover rounded-t-lg"
-              />
+              <picture className="block w-full h-full">
+                {game.cover_srcset?.webp && (
+                  <source type="image/webp" srcSet={game.cover_srcset.webp} sizes="320px" />
+                )}
+                <img
+                  src={game.cover_image}
+                  srcSet={game.cover_srcset?.jpeg}
+                  sizes="320px"
+                  alt={game.title}
+                  loading="lazy"
+                  className="w-full h-full object-cover rounded-t-lg"
+                />
+              </picture>
             ) : (
               <div className="flex items-center justify-center w-full h-full bg-neutral-700 text-neutral-500 text-sm">
                 Image coming soon
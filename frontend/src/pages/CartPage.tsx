@@ -1,4 +1,5 @@
-import { useEffect, useState, useMemo } from "react";
+import { useEffect, useState, useMemo, useRef } from "react";
+import { isAxiosError } from "axios";
 import { useNavigate } from "react-router-dom";
 import { motion, AnimatePresence } from "framer-motion";
 import { ShoppingCart } from "lucide-react";
@@ -16,6 +17,9 @@ interface CartResponse {
 export default function CartPage() {
   const [cart, setCart] = useState<CartResponse | null>(null);
   const [loading, setLoading] = useState(true);
+  // Idempotency-Key of the current checkout attempt – reused on retries after a network
+  // failure, so an order that did go through is returned instead of "cart is empty"
+  const checkoutKey = useRef<string | null>(null);
   const navigate = useNavigate();
 
   const fetchCart = async () => {
@@ -34,6 +38,7 @@ export default function CartPage() {
   const updateQuantity = async (itemId: number, quantity: number) => {
     try {
       await api.patch(`/cart/update/${itemId}/`, { quantity });
+      checkoutKey.current = null;
       fetchCart();
     } catch (err) {
       console.error("Update cart item failed:", err);
@@ -43,6 +48,7 @@ export default function CartPage() {
   const removeItem = async (itemId: number) => {
     try {
       await api.delete(`/cart/remove/${itemId}/`);
+      checkoutKey.current = null;
       fetchCart();
     } catch (err) {
       console.error("Remove cart item failed:", err);
@@ -51,21 +57,21 @@ export default function CartPage() {
 
   const checkout = async () => {
     if (!cart) return;
+    checkoutKey.current ??= crypto.randomUUID();
     try {
-      await Promise.all(
-        cart.items.map((i) =>
-          api.post("/library/", { game: i.game.id })
-        )
-      );
-      await Promise.all(
-        cart.items.map((i) =>
-          api.delete(`/cart/remove/${i.id}/`)
-        )
-      );
+      await api.post("/checkout/", null, {
+        headers: { "Idempotency-Key": checkoutKey.current },
+      });
+      checkoutKey.current = null;
       alert("Order completed! Check your library.");
       fetchCart();
       navigate("/library");
     } catch (err) {
+      // a 4xx answer ends the attempt; a lost response or 5xx (e.g. a proxy timeout) may hide
+      // a completed order, so the retry keeps the key
+      if (isAxiosError(err) && err.response && err.response.status < 500) {
+        checkoutKey.current = null;
+      }
       console.error("Checkout failed:", err);
       alert("Something went wrong during checkout.");
     }